@@ -255,6 +255,29 @@ HTML
     return $([ "$test_result" = "success" ] && echo 0 || echo 1)
 }
 
+# Function to precompile the hook's modules and config artifact
+# The hook runs as a script on every prompt, so its helper modules are only
+# fast to import if their bytecode already exists (PYTHONDONTWRITEBYTECODE or
+# a read-only install would otherwise force a recompile each time)
+precompile_hook() {
+    local hook_modules=(
+        "$SNIPPETS_DIR/snippet_rules.py"
+        "$SNIPPETS_DIR/snippet_artifact.py"
+        "$SNIPPETS_DIR/snippet_session.py"
+        "$SNIPPETS_DIR/snippet_blobs.py"
+    )
+
+    for module in "${hook_modules[@]}"; do
+        if [ -f "$module" ]; then
+            python3 -m compileall -q "$module" >/dev/null
+        fi
+    done
+
+    if [ -f "$SNIPPETS_DIR/snippets_cli.py" ] && [ -f "$SNIPPETS_DIR/config.json" ]; then
+        python3 "$SNIPPETS_DIR/snippets_cli.py" compile >/dev/null
+    fi
+}
+
 # Function to add snippet to config
 add_to_config() {
     local snippet_name=$1
@@ -436,6 +459,7 @@ main() {
 
     # Step 10: Install
     add_to_config "$snippet_name" "$pattern"
+    precompile_hook
 
     print_color "$GREEN" "🎉 Success! Snippet '${snippet_name}' has been installed."
     print_color "$GREEN" "Files created:"
@@ -448,5 +472,12 @@ main() {
     print_color "$BLUE" "  echo 'your test text' | claude"
 }
 
+# Non-interactive: only refresh precompiled bytecode and config artifact
+if [ "$1" = "--compile" ]; then
+    precompile_hook
+    print_color "$GREEN" "✓ Hook precompiled"
+    exit 0
+fi
+
 # Run main function
 main "$@"
\ No newline at end of file
@@ -1,64 +1,110 @@
 #!/usr/bin/env python3
+# Cold-start path: only json, re (for the patterns) and builtin modules are
+# imported. snippet_session (builtins only) is loaded for the usual prompt with
+# a session_id and dedup on; snippet_blobs only when a compressed body fires.
+# Config parsing, path resolution and rule compilation happen in
+# snippets_cli.py and are loaded from a marshal artifact.
 import json
+import os
 import sys
-import re
-from pathlib import Path
+
+from snippet_artifact import artifact_path, build, load_artifact
+from snippet_rules import MatchSet, fired
 
 # All paths relative to snippets directory
-SNIPPETS_DIR = Path(__file__).parent
-CONFIG_PATH = SNIPPETS_DIR / 'config.json'
+SNIPPETS_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.path.join(SNIPPETS_DIR, 'config.json')
+ARTIFACT_PATH = artifact_path(SNIPPETS_DIR)
+SESSIONS_DIR = os.path.join(os.path.dirname(ARTIFACT_PATH), 'sessions')
 
 try:
     # Read the hook input
     input_data = json.load(sys.stdin)
     prompt = input_data.get('prompt', '')
+    session_id = input_data.get('session_id')
 
-    # Load config
-    with open(CONFIG_PATH) as f:
-        config = json.load(f)
+    # Compaction summarizes earlier snippet bodies away while keeping the
+    # session_id; forget what was sent so it is injected again
+    event = input_data.get('hook_event_name', 'UserPromptSubmit')
+    if event in ('PreCompact', 'SessionStart'):
+        if session_id and (event == 'PreCompact' or input_data.get('source') == 'compact'):
+            from snippet_session import forget
+            forget(SESSIONS_DIR, session_id)
+        sys.exit(0)
 
-    # Check for matches (all patterns are regex)
-    matched_snippets = []
-    for mapping in config['mappings']:
-        # Skip disabled snippets
-        if not mapping.get('enabled', True):
-            continue
+    # Load the compiled config; rebuild it if config.json was edited by hand
+    compiled = load_artifact(ARTIFACT_PATH, SNIPPETS_DIR, CONFIG_PATH)
+    if compiled is None:
+        compiled = build(SNIPPETS_DIR, CONFIG_PATH, best_effort=True)
 
-        pattern = mapping['pattern']
+    for message in compiled['rule_errors'].values():
+        print(f"Hook rule error: {message}", file=sys.stderr)
 
-        # All patterns are treated as regex with case-insensitive matching
-        if re.search(pattern, prompt, re.IGNORECASE):
-            # Store snippet files array and separator
-            snippet_files = mapping['snippet']  # Now always an array
-            separator = mapping.get('separator', '\n')
-            matched_snippets.append((snippet_files, separator))
+    # Evaluate every enabled mapping's rule over one shared match set. Each
+    # pattern is matched at most once, and only if some rule needs it
+    # (disabled mappings can still be referenced by other rules)
+    entries = compiled['entries']
+    matches = MatchSet(prompt, compiled['patterns'])
+    results = fired(compiled['nodes'], compiled['roots'],
+                    [entry[0] for entry in entries if entry[1]], matches)
 
-    # Remove duplicates while preserving order
+    # Collect (files, separator, body key) for mappings that fired, removing
+    # duplicates while preserving order
     seen = set()
-    unique_snippets = []
-    for snippet_tuple in matched_snippets:
-        key = (tuple(snippet_tuple[0]), snippet_tuple[1])
-        if key not in seen:
-            seen.add(key)
-            unique_snippets.append(snippet_tuple)
-    matched_snippets = unique_snippets
+    matched_snippets = []
+    for name, enabled, snippet_files, separator, body_key in entries:
+        if enabled and results.get(name):
+            key = (snippet_files, separator)
+            if key not in seen:
+                seen.add(key)
+                matched_snippets.append((snippet_files, separator, body_key))
+
+    # Skip bodies already injected earlier in this session
+    session = None
+    session_settings = compiled['session']
+    if session_id and session_settings['dedup']:
+        from snippet_session import SessionState, content_id
+        session = SessionState(SESSIONS_DIR, session_id,
+                               session_settings['reinject_after_turns'],
+                               session_settings['ttl_hours'])
+
+    # Compressed blobs are decompressed only for the mappings that fired
+    reader = None
+    if matched_snippets and compiled['compression']:
+        from snippet_blobs import BodyReader
+        reader = BodyReader(SNIPPETS_DIR, os.path.dirname(ARTIFACT_PATH),
+                            compiled['compression'])
 
     # Load and append snippets
     if matched_snippets:
         additional_context = []
-        for snippet_files, separator in matched_snippets:
+        for snippet_files, separator, body_key in matched_snippets:
+            # Blob-backed bodies are identified by digest, so ones already sent
+            # this session are skipped before being read or decompressed
+            if session is not None and body_key is not None:
+                if not session.should_inject(body_key):
+                    continue
+
             # Load all files for this snippet and join with separator
             file_contents = []
-            for snippet_file in snippet_files:
-                snippet_path = SNIPPETS_DIR / snippet_file
-                if snippet_path.exists():
-                    with open(snippet_path) as f:
-                        content = f.read()
-                        file_contents.append(content)
+            for snippet_path in snippet_files:
+                try:
+                    if reader is not None:
+                        file_contents.append(reader.read(snippet_path))
+                    else:
+                        with open(snippet_path) as f:
+                            file_contents.append(f.read())
+                except FileNotFoundError:
+                    continue
 
             # Join files with separator and add to context
             if file_contents:
                 combined_content = separator.join(file_contents)
+                if session is not None:
+                    cid = body_key if body_key is not None else content_id(combined_content)
+                    if not session.should_inject(cid):
+                        continue
+                    session.mark(cid)
                 additional_context.append(combined_content)
 
         if additional_context:
@@ -71,10 +117,15 @@ try:
             }
             print(json.dumps(output))
 
+    if session is not None:
+        session.save()
+    if reader is not None:
+        reader.save()
+
 except Exception as e:
     # Log error to stderr for debugging
     print(f"Hook error: {e}", file=sys.stderr)
     # Exit gracefully - don't block the prompt
     pass
 
-sys.exit(0)
\ No newline at end of file
+sys.exit(0)
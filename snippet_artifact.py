@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Compiled config artifact
+
+The hook runs on every prompt, so it should not parse config.json, resolve
+paths or compile rules each time. snippets_cli.py compiles the config into a
+marshal file under .cache/ whenever it saves; the hook loads that with a
+single read and only falls back to config.json when the artifact is missing
+or stale (and then rewrites it).
+
+Only builtin modules are imported here so the fast path stays cheap.
+"""
+
+import marshal
+import os
+
+ARTIFACT_VERSION = 6
+CACHE_DIRNAME = '.cache'
+ARTIFACT_NAME = 'config.marshal'
+
+
+def artifact_path(base_dir):
+    """Location of the compiled artifact for a snippets root"""
+    return os.path.join(base_dir, CACHE_DIRNAME, ARTIFACT_NAME)
+
+
+def config_stat(config_path):
+    """Cheap freshness key for config.json"""
+    st = os.stat(config_path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _compression_settings(config):
+    """Hot-cache settings the hook needs for compressed blobs, or None"""
+    compression = config.get('compression')
+    if not compression or config.get('storage') != 'blobs':
+        return None
+    from snippet_blobs import DEFAULT_COMPRESSION
+
+    return {key: compression.get(key, DEFAULT_COMPRESSION[key])
+            for key in ('hot_after', 'hot_cache_bytes')}
+
+
+def compile_config(config, base_dir, stat):
+    """Compile a loaded config into the plain-data artifact the hook consumes.
+
+    stat is the (mtime_ns, size) of config.json taken before it was
+    read, so an edit racing the compile leaves the artifact stale, not wrong.
+    """
+    from snippet_rules import compile_mappings, mapping_keys
+    from snippet_session import settings
+
+    mappings = config.get('mappings', [])
+    graph, rule_errors = compile_mappings(mappings)
+
+    entries = []
+    patterns = {}
+    for name, mapping in zip(mapping_keys(mappings), mappings):
+        patterns[name] = mapping['pattern']
+        separator = mapping.get('separator', '\n')
+        body_key = None
+        if 'blobs' in mapping and len(mapping['blobs']) != len(mapping['snippet']):
+            # A hand-edited blobs list that doesn't line up with snippet
+            # (`validate` reports it); the loose files may be older than the
+            # blobs, so inject nothing rather than a stale body
+            files = ()
+        elif 'blobs' in mapping:
+            # Content-addressed storage: read bodies straight from the blob
+            # store (files missing at migration have no digest; use the file)
+            from snippet_blobs import relpath
+            files = tuple(os.path.join(base_dir, relpath(d) if d else f)
+                          for f, d in zip(mapping['snippet'], mapping['blobs']))
+            # Content-addressed bodies can be deduplicated per session by
+            # digest, before anything is read or decompressed
+            if all(mapping['blobs']):
+                body_key = (tuple(mapping['blobs']), separator)
+        else:
+            files = tuple(os.path.join(base_dir, f) for f in mapping['snippet'])
+        entries.append((name, mapping.get('enabled', True), files, separator, body_key))
+
+    return {
+        'version': ARTIFACT_VERSION,
+        'base_dir': base_dir,
+        'config_stat': tuple(stat),
+        'entries': entries,
+        'patterns': patterns,
+        'nodes': graph.nodes,
+        'roots': graph.roots,
+        'rule_errors': rule_errors,
+        'session': settings(config),
+        'compression': _compression_settings(config),
+    }
+
+
+def write_artifact(compiled, path):
+    """Atomically write a compiled artifact"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        marshal.dump(compiled, f)
+    os.replace(tmp_path, path)
+
+
+def load_artifact(path, base_dir, config_path):
+    """Load the artifact if it is current for config_path, else None"""
+    try:
+        with open(path, 'rb') as f:
+            compiled = marshal.load(f)
+        current = config_stat(config_path)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if (not isinstance(compiled, dict)
+            or compiled.get('version') != ARTIFACT_VERSION
+            or compiled.get('base_dir') != base_dir
+            or compiled.get('config_stat') != current):
+        return None
+    return compiled
+
+
+def build(base_dir, config_path, path=None, best_effort=False):
+    """Compile config.json from disk and write the artifact; returns it.
+
+    With best_effort, failing to write the artifact (read-only install) is
+    ignored and the in-memory result is still returned.
+    """
+    import json
+
+    stat = config_stat(config_path)
+    with open(config_path) as f:
+        config = json.load(f)
+    compiled = compile_config(config, base_dir, stat)
+    try:
+        write_artifact(compiled, path or artifact_path(base_dir))
+    except OSError:
+        if not best_effort:
+            raise
+    return compiled
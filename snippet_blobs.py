@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Content-addressed snippet storage
+
+With "storage": "blobs" in config.json, snippet bodies live in
+blobs/<aa>/<rest-of-sha256> and mappings reference them by hash:
+
+    {
+      "name": "HTML",
+      "pattern": "\\bHTML\\b",
+      "snippet": ["snippets/HTML.md"],     # logical name, kept for display
+      "blobs": ["3f5a..."]                 # what the hook actually reads
+    }
+
+Identical bodies are stored once, updates and renames only swap pointers in
+config.json, and blobs nobody references are removed by `snippets_cli.py gc`.
+
+Blobs can optionally be stored zlib-compressed against a preset dictionary
+trained on the library ("compression" key, see `snippets_cli.py storage
+compressed`). A blob's address is always the hash of its uncompressed body,
+so compressing never changes pointers. The hook reads blobs through
+BodyReader, which decompresses only bodies that fired and keeps frequently
+fired ones in a small decompressed cache.
+
+hashlib is imported lazily: the hook imports this module on its cold path.
+"""
+
+import marshal
+import os
+import zlib
+from collections import Counter
+
+BLOBS_DIRNAME = 'blobs'
+HOT_DIRNAME = 'hot'
+# Overrides where the hook keeps its hot cache; `bench` points it at scratch
+# directories so timing runs don't skew the fire counts of real prompts
+HOT_DIR_ENV = 'SNIPPETS_HOT_DIR'
+
+# Compressed blob layout: MAGIC, 64 hex chars of the dictionary blob digest,
+# then a raw zlib stream
+MAGIC = b'SNZ1'
+_HEADER_LEN = len(MAGIC) + 64
+ZDICT_MAX_BYTES = 32 * 1024
+
+DEFAULT_COMPRESSION = {
+    'codec': 'zlib',
+    'level': 9,
+    'hot_after': 3,
+    'hot_cache_bytes': 256 * 1024,
+}
+
+
+def digest(data):
+    """sha256 hex digest of a body (str is UTF-8 encoded)"""
+    import hashlib
+
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+def relpath(blob_digest):
+    """Path of a blob relative to the snippets root"""
+    return f"{BLOBS_DIRNAME}/{blob_digest[:2]}/{blob_digest[2:]}"
+
+
+def refcounts(mappings, compression=None):
+    """Number of references to each blob digest (mappings plus the dictionary)"""
+    counts = Counter()
+    for mapping in mappings:
+        counts.update(d for d in mapping.get('blobs', []) if d)
+    if compression and compression.get('dict'):
+        counts[compression['dict']] += 1
+    return counts
+
+
+def is_compressed(data):
+    return data[:len(MAGIC)] == MAGIC
+
+
+def compress(data, zdict, zdict_digest, level=9):
+    """Compress a body against a preset dictionary"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15, 9,
+                                  zlib.Z_DEFAULT_STRATEGY, zdict)
+    return (MAGIC + zdict_digest.encode('ascii')
+            + compressor.compress(data) + compressor.flush())
+
+
+def decompress(data, load_zdict):
+    """Decompress a blob; load_zdict(digest) returns the dictionary bytes"""
+    zdict_digest = data[len(MAGIC):_HEADER_LEN].decode('ascii')
+    decompressor = zlib.decompressobj(-15, load_zdict(zdict_digest))
+    return decompressor.decompress(data[_HEADER_LEN:]) + decompressor.flush()
+
+
+def train_zdict(bodies, max_bytes=ZDICT_MAX_BYTES):
+    """Build a zlib preset dictionary from a corpus of bodies.
+
+    Lines that repeat across the library (CSS rules, markdown scaffolding,
+    shared instructions) are scored by bytes saved; the best ones go last,
+    since deflate reaches the end of the dictionary with the shortest
+    distances.
+    """
+    counts = Counter()
+    for body in bodies:
+        text = body.decode('utf-8') if isinstance(body, bytes) else body
+        counts.update(line for line in text.splitlines(keepends=True)
+                      if len(line.strip()) >= 4)
+
+    scored = sorted(((count - 1) * len(line.encode('utf-8')), line)
+                    for line, count in counts.items() if count > 1)
+    chosen = []
+    size = 0
+    for score, line in reversed(scored):
+        encoded = line.encode('utf-8')
+        if size + len(encoded) > max_bytes:
+            continue
+        chosen.append(encoded)
+        size += len(encoded)
+    return b''.join(reversed(chosen))
+
+
+class BlobStore:
+    """Blob directory under a snippets root"""
+
+    def __init__(self, base_dir, compression=None):
+        self.base_dir = base_dir
+        self.root = os.path.join(base_dir, BLOBS_DIRNAME)
+        self.compression = compression
+        self._zdicts = {}
+
+    def path(self, blob_digest):
+        return os.path.join(self.base_dir, relpath(blob_digest))
+
+    def exists(self, blob_digest):
+        return os.path.exists(self.path(blob_digest))
+
+    def zdict(self, zdict_digest):
+        """Dictionary bytes for a dictionary blob digest (cached)"""
+        if zdict_digest not in self._zdicts:
+            with open(self.path(zdict_digest), 'rb') as f:
+                self._zdicts[zdict_digest] = f.read()
+        return self._zdicts[zdict_digest]
+
+    def _write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def encode(self, data, compression=None):
+        """On-disk form of a body under the given (or current) compression.
+
+        Bodies that don't shrink (tiny ones, mostly) are kept raw; readers
+        tell the two apart by MAGIC.
+        """
+        compression = compression if compression is not None else self.compression
+        if not compression:
+            return data
+        zdict_digest = compression['dict']
+        packed = compress(data, self.zdict(zdict_digest), zdict_digest,
+                          compression.get('level', DEFAULT_COMPRESSION['level']))
+        return packed if len(packed) < len(data) else data
+
+    def put(self, content, raw=False):
+        """Store a body if not already present; returns its digest.
+
+        raw stores the bytes uncompressed (used for dictionaries themselves).
+        """
+        data = content.encode('utf-8') if isinstance(content, str) else content
+        blob_digest = digest(data)
+        path = self.path(blob_digest)
+        if not os.path.exists(path):
+            self._write(path, data if raw else self.encode(data))
+        elif raw or not self.compression:
+            # Reusing a body left compressed by an earlier storage mode;
+            # readers without compression expect it raw
+            with open(path, 'rb') as f:
+                stored_compressed = is_compressed(f.read(len(MAGIC)))
+            if stored_compressed:
+                self._write(path, data)
+        return blob_digest
+
+    def recode(self, blob_digest, compression):
+        """Rewrite a stored blob under different compression (None = plain)"""
+        data = self.read_bytes(blob_digest)
+        self._write(self.path(blob_digest), self.encode(data, compression or {}))
+
+    def read_bytes(self, blob_digest):
+        """Uncompressed body bytes"""
+        with open(self.path(blob_digest), 'rb') as f:
+            data = f.read()
+        return decompress(data, self.zdict) if is_compressed(data) else data
+
+    def get(self, blob_digest):
+        return self.read_bytes(blob_digest).decode('utf-8')
+
+    def size(self, blob_digest):
+        """Uncompressed body size"""
+        return len(self.read_bytes(blob_digest))
+
+    def disk_size(self, blob_digest):
+        return os.stat(self.path(blob_digest)).st_size
+
+    def delete(self, blob_digest):
+        os.unlink(self.path(blob_digest))
+        try:
+            os.rmdir(os.path.dirname(self.path(blob_digest)))
+        except OSError:
+            pass
+
+    def __iter__(self):
+        """Digests of every stored blob"""
+        if not os.path.isdir(self.root):
+            return
+        for prefix in sorted(os.listdir(self.root)):
+            prefix_dir = os.path.join(self.root, prefix)
+            if len(prefix) != 2 or not os.path.isdir(prefix_dir):
+                continue
+            for rest in sorted(os.listdir(prefix_dir)):
+                if not rest.endswith('.tmp'):
+                    yield prefix + rest
+
+
+class BodyReader:
+    """Hook-side reader for compressed blobs with a small hot cache.
+
+    Bodies are only decompressed when their mapping fired. Each fire is
+    counted; once a body has fired hot_after times it is kept decompressed in
+    .cache/hot/ (bounded by hot_cache_bytes, least-fired evicted first), or
+    in $SNIPPETS_HOT_DIR if set.
+    """
+
+    def __init__(self, base_dir, cache_dir, settings):
+        self.base_dir = base_dir
+        self.blobs_root = os.path.join(base_dir, BLOBS_DIRNAME) + os.sep
+        self.hot_dir = os.environ.get(HOT_DIR_ENV) or os.path.join(cache_dir, HOT_DIRNAME)
+        self.hot_after = settings.get('hot_after', DEFAULT_COMPRESSION['hot_after'])
+        self.hot_cache_bytes = settings.get('hot_cache_bytes',
+                                            DEFAULT_COMPRESSION['hot_cache_bytes'])
+        self._index_path = os.path.join(self.hot_dir, 'index.marshal')
+        self._index = None
+        self._dirty = False
+        self._zdicts = {}
+        self.decompressed = 0
+        self.hot_hits = 0
+
+    def zdict(self, zdict_digest):
+        if zdict_digest not in self._zdicts:
+            with open(os.path.join(self.base_dir, relpath(zdict_digest)), 'rb') as f:
+                self._zdicts[zdict_digest] = f.read()
+        return self._zdicts[zdict_digest]
+
+    def _load_index(self):
+        if self._index is None:
+            try:
+                with open(self._index_path, 'rb') as f:
+                    self._index = marshal.load(f)
+            except (OSError, EOFError, ValueError, TypeError):
+                self._index = {'counts': {}, 'hot': {}}
+        return self._index
+
+    def _promote(self, blob_digest, data):
+        index = self._index
+        if len(data) > self.hot_cache_bytes:
+            return
+        hot = index['hot']
+        counts = index['counts']
+        # Evict the least-fired bodies until the new one fits
+        while hot and sum(hot.values()) + len(data) > self.hot_cache_bytes:
+            coldest = min(hot, key=lambda d: counts.get(d, 0))
+            if counts.get(coldest, 0) >= counts.get(blob_digest, 0):
+                return
+            del hot[coldest]
+            try:
+                os.unlink(os.path.join(self.hot_dir, coldest))
+            except FileNotFoundError:
+                pass
+        os.makedirs(self.hot_dir, exist_ok=True)
+        # Concurrent hooks may be reading this body; never expose a partial file
+        hot_path = os.path.join(self.hot_dir, blob_digest)
+        tmp_path = f"{hot_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, hot_path)
+        hot[blob_digest] = len(data)
+
+    def read(self, path):
+        """Body text of the blob at path (blobs/<aa>/<rest>) for a fired mapping"""
+        if not path.startswith(self.blobs_root):
+            # Loose file standing in for a body missing from the blob store
+            with open(path, 'rb') as f:
+                return f.read().decode('utf-8')
+        blob_digest = os.path.basename(os.path.dirname(path)) + os.path.basename(path)
+        index = self._load_index()
+        counts = index['counts']
+        counts[blob_digest] = counts.get(blob_digest, 0) + 1
+        self._dirty = True
+
+        if blob_digest in index['hot']:
+            try:
+                with open(os.path.join(self.hot_dir, blob_digest), 'rb') as f:
+                    self.hot_hits += 1
+                    return f.read().decode('utf-8')
+            except FileNotFoundError:
+                del index['hot'][blob_digest]
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        if is_compressed(data):
+            data = decompress(data, self.zdict)
+            self.decompressed += 1
+            if counts[blob_digest] >= self.hot_after:
+                self._promote(blob_digest, data)
+        return data.decode('utf-8')
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(self.hot_dir, exist_ok=True)
+        tmp_path = f"{self._index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            marshal.dump(self._index, f)
+        os.replace(tmp_path, self._index_path)
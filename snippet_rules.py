@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Snippet trigger rules
+
+A small boolean language for deciding when a mapping fires, compiled into a
+shared decision graph that is evaluated once per prompt.
+
+By default a mapping fires when its own pattern matches. A mapping may set a
+"when" rule to override that:
+
+    "when": "self and not exa"          # own pattern matched, exa did not
+    "when": "search and not exa"        # fire off other mappings' results
+    "when": "self >= 2"                 # at least 2 hits of own pattern
+    "when": "(search or google) and not (exa or annas-archive)"
+
+Grammar:
+
+    expr  := or
+    or    := and ('or' and)*
+    and   := not ('and' not)*
+    not   := 'not' not | atom
+    atom  := '(' expr ')' | NAME [CMP INT]
+    CMP   := '>=' | '>' | '<=' | '<' | '==' | '!='
+
+NAME is a mapping name or 'self'. A bare NAME means 'NAME >= 1'.
+
+The compiled graph is plain data (lists, tuples, dicts) so it can be
+serialized alongside the rest of the compiled config. Identical
+sub-expressions are shared between rules, and every pattern is scanned at most
+once per prompt no matter how many rules reference it.
+"""
+
+import re
+
+# Node layouts in the compiled graph:
+#   ('hits', name, op, threshold)
+#   ('not', child)
+#   ('and', (child, ...))
+#   ('or', (child, ...))
+
+_TOKEN_RE = re.compile(r'\s*(?:(\()|(\))|(>=|<=|==|!=|>|<)|(\d+)|([A-Za-z_][\w.-]*))')
+_KEYWORDS = ('and', 'or', 'not')
+_OPS = {
+    '>=': lambda a, b: a >= b,
+    '>': lambda a, b: a > b,
+    '<=': lambda a, b: a <= b,
+    '<': lambda a, b: a < b,
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+}
+
+
+class RuleError(ValueError):
+    """Raised when a rule cannot be parsed or references an unknown mapping"""
+
+
+def mapping_name(mapping):
+    """Name of a mapping: explicit name, else stem of its first snippet file"""
+    if mapping.get('name'):
+        return mapping['name']
+    files = mapping.get('snippet') or ['']
+    base = files[0].replace('\\', '/').rsplit('/', 1)[-1]
+    return base[:-3] if base.endswith('.md') else base
+
+
+def mapping_keys(mappings):
+    """Unique rule key for every mapping, in order.
+
+    Explicitly named mappings are keyed by their name; a repeated name keeps
+    only its first mapping, later ones get 'name#index' (and are rejected by
+    compile_mappings). Unnamed mappings are keyed by their file stem when it
+    is unambiguous, else by their first snippet path, else by '#index'.
+    Only names and unambiguous stems can be referenced from rules.
+    """
+    keys = [None] * len(mappings)
+    taken = set()
+    for index, mapping in enumerate(mappings):
+        name = mapping.get('name')
+        if name:
+            keys[index] = name if name not in taken else f"{name}#{index}"
+            taken.add(name)
+
+    stems = {}
+    for index, mapping in enumerate(mappings):
+        if keys[index] is None:
+            stems.setdefault(mapping_name(mapping), []).append(index)
+    for stem, indexes in stems.items():
+        for index in indexes:
+            if len(indexes) == 1 and stem and stem not in taken:
+                key = stem
+            else:
+                files = mappings[index].get('snippet') or ['']
+                key = files[0]
+                if not key or key in taken:
+                    key = f"#{index}"
+            keys[index] = key
+            taken.add(key)
+    return keys
+
+
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        m = _TOKEN_RE.match(text, pos)
+        if not m:
+            raise RuleError(f"Unexpected character at position {pos}: {text[pos:pos + 10]!r}")
+        pos = m.end()
+        lparen, rparen, op, number, word = m.groups()
+        if lparen:
+            tokens.append(('(', lparen))
+        elif rparen:
+            tokens.append((')', rparen))
+        elif op:
+            tokens.append(('op', op))
+        elif number:
+            tokens.append(('int', int(number)))
+        elif word in _KEYWORDS:
+            tokens.append((word, word))
+        else:
+            tokens.append(('name', word))
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser producing a nested tuple AST"""
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.pos = 0
+
+    def _peek(self):
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def _take(self, kind):
+        if self._peek() != kind:
+            found = self.tokens[self.pos][1] if self.pos < len(self.tokens) else 'end of rule'
+            raise RuleError(f"Expected {kind!r} but found {found!r} in rule {self.text!r}")
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token[1]
+
+    def parse(self):
+        if not self.tokens:
+            raise RuleError("Rule is empty")
+        node = self._or()
+        if self.pos != len(self.tokens):
+            raise RuleError(f"Unexpected {self.tokens[self.pos][1]!r} in rule {self.text!r}")
+        return node
+
+    def _or(self):
+        children = [self._and()]
+        while self._peek() == 'or':
+            self._take('or')
+            children.append(self._and())
+        return children[0] if len(children) == 1 else ('or', tuple(children))
+
+    def _and(self):
+        children = [self._not()]
+        while self._peek() == 'and':
+            self._take('and')
+            children.append(self._not())
+        return children[0] if len(children) == 1 else ('and', tuple(children))
+
+    def _not(self):
+        if self._peek() == 'not':
+            self._take('not')
+            return ('not', self._not())
+        return self._atom()
+
+    def _atom(self):
+        if self._peek() == '(':
+            self._take('(')
+            node = self._or()
+            self._take(')')
+            return node
+        name = self._take('name')
+        if self._peek() == 'op':
+            op = self._take('op')
+            return ('hits', name, op, self._take('int'))
+        return ('hits', name, '>=', 1)
+
+
+def parse(text):
+    """Parse a rule into a nested tuple AST"""
+    return _Parser(text).parse()
+
+
+class RuleGraph:
+    """Decision graph shared by every mapping in a config.
+
+    Nodes are hash-consed, so a sub-expression used by several rules is a
+    single node and is evaluated once.
+    """
+
+    def __init__(self):
+        self.nodes = []
+        self.roots = {}
+        self._index = {}
+
+    def _intern(self, node):
+        node_id = self._index.get(node)
+        if node_id is None:
+            node_id = len(self.nodes)
+            self.nodes.append(node)
+            self._index[node] = node_id
+        return node_id
+
+    def _build(self, ast, owner, known):
+        kind = ast[0]
+        if kind == 'hits':
+            name = owner if ast[1] == 'self' else ast[1]
+            if name not in known:
+                raise RuleError(f"Rule for '{owner}' references unknown mapping '{name}'")
+            return self._intern(('hits', name, ast[2], ast[3]))
+        if kind == 'not':
+            return self._intern(('not', self._build(ast[1], owner, known)))
+        children = tuple(self._build(child, owner, known) for child in ast[1])
+        return self._intern((kind, children))
+
+    def add(self, name, rule, known):
+        """Compile a mapping's rule (None means 'self') and register it as a root"""
+        ast = parse(rule) if rule is not None else ('hits', 'self', '>=', 1)
+        self.roots[name] = self._build(ast, name, known)
+        return self.roots[name]
+
+    def referenced(self):
+        """Names of all mappings whose patterns some rule depends on"""
+        return {node[1] for node in self.nodes if node[0] == 'hits'}
+
+
+def compile_mappings(mappings):
+    """Compile every mapping's rule into one graph.
+
+    Mappings are keyed by mapping_keys(). Returns (graph, errors) where errors
+    maps mapping key to the message for rules that failed to compile (or
+    duplicate names); those mappings have no root and never fire.
+    """
+    keys = mapping_keys(mappings)
+    known = set(keys)
+    graph = RuleGraph()
+    errors = {}
+    for key, mapping in zip(keys, mappings):
+        if mapping.get('name') and key != mapping['name']:
+            errors[key] = f"Duplicate mapping name '{mapping['name']}'"
+            continue
+        try:
+            graph.add(key, mapping.get('when'), known)
+        except RuleError as e:
+            errors[key] = str(e)
+    return graph, errors
+
+
+class MatchSet:
+    """Lazily computed, shared pattern results for a single prompt.
+
+    A pattern is only scanned when a rule needs it. Presence checks stop at the
+    first hit; a full count is only taken when a threshold needs it, and is
+    then reused for presence as well.
+    """
+
+    def __init__(self, prompt, patterns):
+        self.prompt = prompt
+        self.patterns = patterns
+        self.counts = {}
+        self.present = {}
+
+    def _compiled(self, name):
+        pattern = self.patterns[name]
+        if isinstance(pattern, str):
+            pattern = self.patterns[name] = re.compile(pattern, re.IGNORECASE)
+        return pattern
+
+    def count(self, name):
+        if name not in self.counts:
+            self.counts[name] = sum(1 for _ in self._compiled(name).finditer(self.prompt))
+            self.present[name] = self.counts[name] > 0
+        return self.counts[name]
+
+    def hits(self, name, op, threshold):
+        """Hit count sufficient to decide 'hits op threshold'"""
+        if op == '>=' and threshold == 1 and name not in self.counts:
+            if name not in self.present:
+                self.present[name] = self._compiled(name).search(self.prompt) is not None
+            return int(self.present[name])
+        return self.count(name)
+
+
+def evaluate(nodes, root, matches, memo):
+    """Evaluate one root of the graph, short-circuiting and memoizing nodes"""
+    if root in memo:
+        return memo[root]
+    node = nodes[root]
+    kind = node[0]
+    if kind == 'hits':
+        value = _OPS[node[2]](matches.hits(node[1], node[2], node[3]), node[3])
+    elif kind == 'not':
+        value = not evaluate(nodes, node[1], matches, memo)
+    elif kind == 'and':
+        value = all(evaluate(nodes, child, matches, memo) for child in node[1])
+    else:
+        value = any(evaluate(nodes, child, matches, memo) for child in node[1])
+    memo[root] = value
+    return value
+
+
+def fired(nodes, roots, names, matches):
+    """Evaluate the given roots over one shared match set; returns {name: bool}"""
+    memo = {}
+    return {name: evaluate(nodes, roots[name], matches, memo) for name in names if name in roots}
+
+
+def explain(nodes, root, matches):
+    """Evaluate a root without short-circuiting and return a trace tree"""
+    node = nodes[root]
+    kind = node[0]
+    if kind == 'hits':
+        count = matches.count(node[1])
+        return {
+            "node": "hits",
+            "mapping": node[1],
+            "op": node[2],
+            "threshold": node[3],
+            "hits": count,
+            "value": _OPS[node[2]](count, node[3]),
+        }
+    if kind == 'not':
+        child = explain(nodes, node[1], matches)
+        return {"node": "not", "value": not child["value"], "children": [child]}
+    children = [explain(nodes, child, matches) for child in node[1]]
+    combine = all if kind == 'and' else any
+    return {"node": kind, "value": combine(c["value"] for c in children), "children": children}
+
+
+def describe(trace):
+    """One-line rendering of a trace, e.g. 'search[2>=1]=T and not(exa[0>=1]=F)'"""
+    kind = trace["node"]
+    if kind == 'hits':
+        flag = 'T' if trace["value"] else 'F'
+        return f"{trace['mapping']}[{trace['hits']}{trace['op']}{trace['threshold']}]={flag}"
+    if kind == 'not':
+        return f"not({describe(trace['children'][0])})"
+    return '(' + f" {kind} ".join(describe(c) for c in trace["children"]) + ')'
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Per-session injection dedup
+
+Claude Code passes a session_id to the UserPromptSubmit hook. For each
+session we keep a tiny marshal record of which snippet bodies were already
+injected (by content id) and on which turn, so a conversation that keeps
+mentioning "HTML" gets HTML.md once instead of on every turn. A changed
+snippet has a new content id and is sent again.
+
+Compaction keeps the session_id but summarizes earlier bodies away, so the
+record is dropped when the hook sees a PreCompact event or a SessionStart
+with source "compact" (see forget()). reinject_after_turns defaults to a
+non-zero value as a safety net for installs without those hooks.
+
+Config (top-level "session" key, all optional):
+
+    "session": {
+        "dedup": true,                # skip bodies already sent this session
+        "reinject_after_turns": 20,   # re-send after N turns (0 = never)
+        "ttl_hours": 24               # drop state for idle sessions
+    }
+
+Only builtin modules are imported here so the hook's cold start stays cheap.
+"""
+
+import marshal
+import os
+import time
+import zlib
+
+STATE_VERSION = 1
+SESSIONS_DIRNAME = 'sessions'
+DEFAULT_SETTINGS = {
+    'dedup': True,
+    'reinject_after_turns': 20,
+    'ttl_hours': 24,
+}
+_SAFE_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_')
+
+
+def settings(config):
+    """Session settings from a config dict, with defaults filled in"""
+    merged = dict(DEFAULT_SETTINGS)
+    merged.update(config.get('session') or {})
+    return merged
+
+
+def content_id(text):
+    """Compact content id: (crc32, length) of the UTF-8 body"""
+    data = text.encode('utf-8')
+    return (zlib.crc32(data), len(data))
+
+
+def _state_path(sessions_dir, session_id):
+    if not session_id or not set(session_id) <= _SAFE_CHARS or len(session_id) > 128:
+        session_id = f"h{zlib.crc32(str(session_id).encode('utf-8')):08x}"
+    return os.path.join(sessions_dir, f"{session_id}.marshal")
+
+
+def forget(sessions_dir, session_id):
+    """Drop a session's record (after compaction); returns whether one existed"""
+    try:
+        os.unlink(_state_path(sessions_dir, session_id))
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def gc(sessions_dir, ttl_hours, now=None):
+    """Remove session records idle for longer than ttl_hours; returns count"""
+    now = now or time.time()
+    cutoff = now - ttl_hours * 3600
+    removed = 0
+    try:
+        names = os.listdir(sessions_dir)
+    except FileNotFoundError:
+        return 0
+    for name in names:
+        path = os.path.join(sessions_dir, name)
+        try:
+            if os.stat(path).st_mtime < cutoff:
+                os.unlink(path)
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+class SessionState:
+    """Injection record for one session"""
+
+    def __init__(self, sessions_dir, session_id, reinject_after_turns=0, ttl_hours=24):
+        self.path = _state_path(sessions_dir, session_id)
+        self.reinject_after_turns = reinject_after_turns
+        self.turn = 0
+        self.sent = {}
+        try:
+            with open(self.path, 'rb') as f:
+                state = marshal.load(f)
+            if state.get('version') == STATE_VERSION:
+                self.turn = state['turn']
+                self.sent = state['sent']
+        except FileNotFoundError:
+            # New session: a good moment to sweep out stale ones
+            gc(sessions_dir, ttl_hours)
+        except (OSError, EOFError, ValueError, TypeError, KeyError, AttributeError):
+            pass
+        self.turn += 1
+
+    def should_inject(self, cid):
+        """Whether a body with this content id still needs to be sent"""
+        last = self.sent.get(cid)
+        if last is None:
+            return True
+        return 0 < self.reinject_after_turns <= self.turn - last
+
+    def mark(self, cid):
+        self.sent[cid] = self.turn
+
+    def save(self):
+        """Persist the record, dropping entries that can no longer block a send"""
+        if self.reinject_after_turns > 0:
+            horizon = self.turn - self.reinject_after_turns
+            self.sent = {cid: turn for cid, turn in self.sent.items() if turn > horizon}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            marshal.dump({'version': STATE_VERSION, 'turn': self.turn, 'sent': self.sent}, f)
+        os.replace(tmp_path, self.path)
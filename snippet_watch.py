@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+File watching for `snippets_cli.py watch`
+
+Uses Linux inotify through ctypes (no third-party dependency) and falls back
+to mtime polling elsewhere. Events are debounced: a burst of editor writes
+(save, rename-into-place, backup file) is delivered as one batch of changed
+paths once the tree has been quiet for the debounce interval.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE | IN_DELETE_SELF)
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """Watch directories (optionally recursively) with inotify"""
+
+    backend = 'inotify'
+
+    def __init__(self, directories, recursive=()):
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise OSError("libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError("inotify is not available on this platform")
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs = {}
+        self._recursive = {os.path.abspath(d) for d in recursive}
+        for directory in list(directories) + list(recursive):
+            self._add_tree(os.path.abspath(directory),
+                           os.path.abspath(directory) in self._recursive)
+
+    def _add(self, directory):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self._dirs[wd] = directory
+
+    def _add_tree(self, directory, recursive):
+        if not os.path.isdir(directory):
+            return
+        self._add(directory)
+        if recursive:
+            for root, dirs, _ in os.walk(directory):
+                for name in dirs:
+                    self._add(os.path.join(root, name))
+
+    def _in_recursive_tree(self, path):
+        return any(path == root or path.startswith(root + os.sep) for root in self._recursive)
+
+    def wait(self, timeout):
+        """Block up to timeout seconds; returns changed paths (possibly empty)"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return set()
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', 'replace')
+            offset += length
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_DELETE_SELF:
+                del self._dirs[wd]
+                continue
+            path = os.path.join(directory, name) if name else directory
+            if mask & IN_ISDIR:
+                # New subdirectories inside a recursive tree get their own watch
+                if mask & (IN_CREATE | IN_MOVED_TO) and self._in_recursive_tree(path):
+                    self._add_tree(path, True)
+                    for root, _, files in os.walk(path):
+                        changed.update(os.path.join(root, f) for f in files)
+                continue
+            changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Portable fallback: compare file mtimes/sizes every interval"""
+
+    backend = 'poll'
+
+    def __init__(self, directories, recursive=(), interval=0.5):
+        self.interval = interval
+        self._directories = [os.path.abspath(d) for d in directories]
+        self._recursive = [os.path.abspath(d) for d in recursive]
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+
+        def record(path):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                return
+            snapshot[path] = (st.st_mtime_ns, st.st_size)
+
+        for directory in self._directories:
+            if os.path.isdir(directory):
+                for entry in os.scandir(directory):
+                    if entry.is_file():
+                        record(entry.path)
+        for directory in self._recursive:
+            for root, _, files in os.walk(directory):
+                for name in files:
+                    record(os.path.join(root, name))
+        return snapshot
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        snapshot = self._scan()
+        changed = {path for path in snapshot.keys() | self._snapshot.keys()
+                   if snapshot.get(path) != self._snapshot.get(path)}
+        self._snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+def open_watcher(directories, recursive=()):
+    """inotify when available, polling otherwise"""
+    try:
+        return InotifyWatcher(directories, recursive)
+    except (OSError, AttributeError):
+        return PollingWatcher(directories, recursive)
+
+
+def batches(watcher, debounce=0.2, idle_timeout=1.0):
+    """Yield sets of changed paths, each once the tree is quiet for debounce seconds"""
+    while True:
+        pending = watcher.wait(idle_timeout)
+        if not pending:
+            continue
+        while True:
+            more = watcher.wait(debounce)
+            if not more:
+                break
+            pending |= more
+        yield pending
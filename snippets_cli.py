@@ -13,8 +13,154 @@ import sys
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 from datetime import datetime
+import os
 import shutil
 import hashlib
+import statistics
+import subprocess
+import tempfile
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import snippet_artifact
+import snippet_rules
+import snippet_session
+import snippet_watch
+from snippet_blobs import (BlobStore, DEFAULT_COMPRESSION, HOT_DIR_ENV, MAGIC, decompress,
+                           digest, is_compressed, refcounts, train_zdict)
+
+
+# Hook cold-start budget: milliseconds the hook may add on top of a bare
+# `python3 -c pass`, and milliseconds of import time for its own modules.
+# Import time is measured against IMPORT_BASELINE, which already imports
+# json and re (machine-dependent, and needed by any hook), so the budget only
+# covers what this repo adds; it leaves ~3x headroom over the current cost.
+HOOK_BUDGET_MS = 25.0
+IMPORT_BUDGET_MS = 5.0
+IMPORT_BASELINE = "import json, re"
+
+# Deep validation limits, overridable via a top-level "limits" key in config
+DEFAULT_LIMITS = {
+    "max_file_bytes": 64 * 1024,
+    "max_mapping_bytes": 128 * 1024,
+    "probe_budget_ms": 50.0
+}
+# Bump when deep checks change so cached results are recomputed
+DEEP_CHECK_VERSION = 2
+# Pattern probes: each unit is repeated at growing lengths and followed by a
+# non-matching suffix to expose catastrophic backtracking. Lengths grow slowly
+# first so an exponential pattern trips the budget before it can hang.
+_PROBE_UNITS = ["a", "a ", "-", "1", "search "]
+_PROBE_LENGTHS = [8, 12, 16, 20, 24, 28, 32, 64, 256, 1024, 4096]
+
+
+def _probe_pattern(compiled, budget_ms: float) -> Optional[Dict]:
+    """Time the probes against a compiled pattern; the first one over budget"""
+    for unit in _PROBE_UNITS:
+        for length in _PROBE_LENGTHS:
+            probe = unit * length + "!"
+            start = time.perf_counter()
+            compiled.search(probe)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if elapsed_ms > budget_ms:
+                return {"probe": f"{unit!r} * {length} + '!'",
+                        "probe_ms": round(elapsed_ms, 3)}
+    return None
+
+
+def _deep_check(job: Dict) -> List[Dict]:
+    """Deep checks for one mapping; runs in a worker process"""
+    issues = []
+    snippet = job["snippet"]
+    limits = job["limits"]
+    blobs = BlobStore(job["base_dir"])
+
+    # Compile and probe the pattern
+    try:
+        compiled = re.compile(job["pattern"], re.IGNORECASE)
+    except re.error as e:
+        compiled = None
+        issues.append({
+            "type": "invalid_pattern",
+            "snippet": snippet,
+            "details": {"pattern": job["pattern"], "error": str(e)}
+        })
+    if compiled is not None:
+        if compiled.search("") is not None:
+            issues.append({
+                "type": "matches_every_prompt",
+                "snippet": snippet,
+                "details": {"pattern": job["pattern"]}
+            })
+        slow = _probe_pattern(compiled, limits["probe_budget_ms"])
+        if slow:
+            issues.append({
+                "type": "slow_pattern",
+                "snippet": snippet,
+                "details": dict(slow, pattern=job["pattern"],
+                                budget_ms=limits["probe_budget_ms"])
+            })
+
+    # Check every referenced body: presence, size, encoding, blob integrity
+    total_size = 0
+    for source in job["sources"]:
+        try:
+            with open(source["path"], 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            issues.append({
+                "type": "missing_blob" if source["blob"] else "missing_file",
+                "snippet": snippet,
+                "path": source["path"]
+            })
+            continue
+
+        # Sizes and encoding apply to the body as injected, not as stored
+        if source["blob"] and is_compressed(data):
+            try:
+                data = decompress(data, blobs.zdict)
+            except (OSError, zlib.error) as e:
+                issues.append({
+                    "type": "corrupt_blob",
+                    "snippet": snippet,
+                    "path": source["path"],
+                    "details": {"error": str(e)}
+                })
+                continue
+
+        total_size += len(data)
+        if len(data) > limits["max_file_bytes"]:
+            issues.append({
+                "type": "oversized_file",
+                "snippet": snippet,
+                "path": source["path"],
+                "details": {"size_bytes": len(data), "limit_bytes": limits["max_file_bytes"]}
+            })
+        try:
+            data.decode("utf-8")
+        except UnicodeDecodeError as e:
+            issues.append({
+                "type": "invalid_encoding",
+                "snippet": snippet,
+                "path": source["path"],
+                "details": {"error": str(e)}
+            })
+        if source["blob"] and digest(data) != source["blob"]:
+            issues.append({
+                "type": "corrupt_blob",
+                "snippet": snippet,
+                "path": source["path"]
+            })
+
+    if total_size > limits["max_mapping_bytes"]:
+        issues.append({
+            "type": "oversized_mapping",
+            "snippet": snippet,
+            "details": {"size_bytes": total_size, "limit_bytes": limits["max_mapping_bytes"]}
+        })
+
+    return issues
 
 
 class SnippetError(Exception):
@@ -32,7 +178,10 @@ class SnippetManager:
     def __init__(self, config_path: Path, snippets_dir: Path):
         self.config_path = config_path
         self.snippets_dir = snippets_dir
+        # Config snippet paths (snippets/foo.md) are relative to this root
+        self.base_dir = os.path.abspath(snippets_dir.parent)
         self.config = self._load_config()
+        self.blobs = BlobStore(self.base_dir, self._compression())
 
     def _load_config(self) -> Dict:
         """Load and validate config file"""
@@ -65,6 +214,20 @@ class SnippetManager:
             json.dump(self.config, f, indent=2)
             f.write('\n')
 
+        # Keep the hook's compiled artifact in sync
+        self._write_artifact()
+
+    def _artifact_path(self) -> Path:
+        """Compiled artifact location (next to the config the hook reads)"""
+        return Path(snippet_artifact.artifact_path(str(self.config_path.parent)))
+
+    def _write_artifact(self) -> Dict:
+        """Compile the in-memory config into the hook's marshal artifact"""
+        stat = snippet_artifact.config_stat(self.config_path)
+        compiled = snippet_artifact.compile_config(self.config, self.base_dir, stat)
+        snippet_artifact.write_artifact(compiled, str(self._artifact_path()))
+        return compiled
+
     def _validate_pattern(self, pattern: str) -> bool:
         """Validate regex pattern"""
         try:
@@ -77,6 +240,28 @@ class SnippetManager:
                 {"pattern": pattern}
             )
 
+    def _validate_rule(self, name: str, rule: str) -> bool:
+        """Validate a trigger rule against the current mapping names"""
+        known = set(snippet_rules.mapping_keys(self.config["mappings"]))
+        known.add(name)
+        try:
+            snippet_rules.RuleGraph().add(name, rule, known)
+            return True
+        except snippet_rules.RuleError as e:
+            raise SnippetError(
+                "INVALID_RULE",
+                f"Invalid trigger rule: {e}",
+                {"name": name, "when": rule}
+            )
+
+    def _mapping_key(self, mapping: Dict) -> str:
+        """Unique rule key of a mapping in the current config"""
+        mappings = self.config["mappings"]
+        for candidate, key in zip(mappings, snippet_rules.mapping_keys(mappings)):
+            if candidate is mapping:
+                return key
+        return snippet_rules.mapping_name(mapping)
+
     def _find_snippet(self, name: str) -> Optional[Dict]:
         """Find snippet by name"""
         for mapping in self.config["mappings"]:
@@ -122,13 +307,49 @@ class SnippetManager:
         data = f"{name}-{datetime.now().isoformat()}"
         return hashlib.sha256(data.encode()).hexdigest()[:16]
 
+    def _uses_blobs(self) -> bool:
+        """Whether snippet bodies live in the content-addressed blob store"""
+        return self.config.get("storage") == "blobs"
+
+    def _compression(self) -> Optional[Dict]:
+        """Compression settings for new blobs, if compressed storage is on"""
+        return self.config.get("compression") if self._uses_blobs() else None
+
+    def _blob_pairs(self, mapping: Dict) -> List[tuple]:
+        """(snippet file, blob digest) pairs of a blob-backed mapping.
+
+        The digest is None for a file that was missing when the mapping was
+        moved into the blob store; the reference itself is kept.
+        """
+        if len(mapping["snippet"]) != len(mapping["blobs"]):
+            raise SnippetError(
+                "CONFIG_ERROR",
+                f"Mapping '{self._mapping_key(mapping)}' lists "
+                f"{len(mapping['snippet'])} snippet file(s) but {len(mapping['blobs'])} blob(s)",
+                {"snippet": mapping["snippet"], "blobs": mapping["blobs"]}
+            )
+        return list(zip(mapping["snippet"], mapping["blobs"]))
+
+    def _read_blobs(self, mapping: Dict) -> List[Optional[str]]:
+        """Bodies of a blob-backed mapping, in order (None where missing)"""
+        return [self.blobs.get(d) if d and self.blobs.exists(d) else None
+                for _, d in self._blob_pairs(mapping)]
+
     def _add_verification_hash(self, file_path: Path, hash_value: str) -> None:
         """Add or update verification hash in snippet file"""
         if not file_path.exists():
             return
 
         with open(file_path, 'r') as f:
-            lines = f.readlines()
+            content = f.read()
+
+        # Write back
+        with open(file_path, 'w') as f:
+            f.write(self._insert_verification_hash(content, hash_value))
+
+    def _insert_verification_hash(self, content: str, hash_value: str) -> str:
+        """Return content with its verification hash added or replaced"""
+        lines = content.splitlines(keepends=True)
 
         # Check if hash already exists
         hash_line_idx = None
@@ -154,9 +375,7 @@ class SnippetManager:
             # Insert after heading
             lines.insert(heading_idx + 1, hash_text)
 
-        # Write back
-        with open(file_path, 'w') as f:
-            f.writelines(lines)
+        return "".join(lines)
 
     def _extract_verification_hash(self, file_path: Path) -> Optional[str]:
         """Extract verification hash from snippet file"""
@@ -174,13 +393,16 @@ class SnippetManager:
 
     def create(self, name: str, pattern: str, content: str = None,
                file_path: str = None, file_paths: List[str] = None,
-               separator: str = '\n', enabled: bool = True, force: bool = False) -> Dict:
+               separator: str = '\n', enabled: bool = True, force: bool = False,
+               when: str = None) -> Dict:
         """Create a new snippet"""
         # Validate inputs
         if not name:
             raise SnippetError("INVALID_INPUT", "Snippet name is required")
 
         self._validate_pattern(pattern)
+        if when is not None:
+            self._validate_rule(name, when)
 
         snippet_file = f"snippets/{name}.md"
         snippet_path = self._get_snippet_path(name)
@@ -204,6 +426,7 @@ class SnippetManager:
 
         # Determine snippet files to use
         snippet_files = []
+        blob_digests = [] if self._uses_blobs() else None
         total_size = 0
 
         if file_paths:
@@ -222,6 +445,9 @@ class SnippetManager:
                     )
                 snippet_files.append(fp)
                 total_size += full_path.stat().st_size
+                if blob_digests is not None:
+                    with open(full_path) as f:
+                        blob_digests.append(self.blobs.put(f.read()))
 
         else:
             # Single-file mode: create new snippet file
@@ -238,19 +464,25 @@ class SnippetManager:
             elif content is None:
                 raise SnippetError("INVALID_INPUT", "Either --content, --file, or --files is required")
 
-            # Create snippets directory if needed
-            self.snippets_dir.mkdir(parents=True, exist_ok=True)
+            verification_hash = self._generate_verification_hash(name)
+            snippet_files = [snippet_file]
 
-            # Write snippet file
-            with open(snippet_path, 'w') as f:
-                f.write(content)
+            if blob_digests is not None:
+                # Store the body by hash; identical bodies are stored once
+                content = self._insert_verification_hash(content, verification_hash)
+                blob_digests.append(self.blobs.put(content))
+                total_size = len(content.encode("utf-8"))
+            else:
+                # Create snippets directory if needed
+                self.snippets_dir.mkdir(parents=True, exist_ok=True)
 
-            # Add verification hash
-            verification_hash = self._generate_verification_hash(name)
-            self._add_verification_hash(snippet_path, verification_hash)
+                # Write snippet file
+                with open(snippet_path, 'w') as f:
+                    f.write(content)
 
-            snippet_files = [snippet_file]
-            total_size = snippet_path.stat().st_size
+                # Add verification hash
+                self._add_verification_hash(snippet_path, verification_hash)
+                total_size = snippet_path.stat().st_size
 
         # Update or add config mapping (always use array format)
         existing = self._find_snippet(name)
@@ -260,14 +492,25 @@ class SnippetManager:
             existing["snippet"] = snippet_files  # Always array
             existing["separator"] = separator
             existing["name"] = name  # Add explicit name field
+            if when is not None:
+                existing["when"] = when
+            if blob_digests is not None:
+                existing["blobs"] = blob_digests
+            else:
+                existing.pop("blobs", None)
         else:
-            self.config["mappings"].append({
+            mapping = {
                 "name": name,  # Add explicit name field
                 "pattern": pattern,
                 "snippet": snippet_files,  # Always array
                 "separator": separator,
                 "enabled": enabled
-            })
+            }
+            if when is not None:
+                mapping["when"] = when
+            if blob_digests is not None:
+                mapping["blobs"] = blob_digests
+            self.config["mappings"].append(mapping)
 
         self._save_config()
 
@@ -278,6 +521,7 @@ class SnippetManager:
             "file_count": len(snippet_files),
             "separator": separator,
             "enabled": enabled,
+            "when": when,
             "alternatives": self._count_alternatives(pattern),
             "size_bytes": total_size,
             "verification_hash": verification_hash if not file_paths else None
@@ -311,21 +555,40 @@ class SnippetManager:
                 "enabled": mapping.get("enabled", True),
                 "alternatives": self._count_alternatives(mapping["pattern"])
             }
+            if "when" in mapping:
+                snippet_info["when"] = mapping["when"]
 
             # Collect info from all files
             total_size = 0
             all_content = []
             missing_files = []
 
-            for snippet_file in snippet_files:
-                snippet_path = self.snippets_dir.parent / snippet_file
-                if snippet_path.exists():
-                    total_size += snippet_path.stat().st_size
-                    if show_content:
-                        with open(snippet_path) as f:
-                            all_content.append(f.read())
-                else:
-                    missing_files.append(snippet_file)
+            if "blobs" in mapping:
+                snippet_info["blobs"] = mapping["blobs"]
+                try:
+                    pairs = self._blob_pairs(mapping)
+                except SnippetError as e:
+                    # Hand-edited lists that don't line up; the hook skips
+                    # this mapping until they are fixed
+                    snippet_info["misaligned_blobs"] = e.message
+                    pairs = []
+                for snippet_file, blob_digest in pairs:
+                    if blob_digest and self.blobs.exists(blob_digest):
+                        total_size += self.blobs.size(blob_digest)
+                        if show_content:
+                            all_content.append(self.blobs.get(blob_digest))
+                    else:
+                        missing_files.append(snippet_file)
+            else:
+                for snippet_file in snippet_files:
+                    snippet_path = self.snippets_dir.parent / snippet_file
+                    if snippet_path.exists():
+                        total_size += snippet_path.stat().st_size
+                        if show_content:
+                            with open(snippet_path) as f:
+                                all_content.append(f.read())
+                    else:
+                        missing_files.append(snippet_file)
 
             snippet_info["size_bytes"] = total_size
             if show_content and all_content:
@@ -346,11 +609,20 @@ class SnippetManager:
             result["enabled"] = sum(1 for s in snippets if s.get("enabled", True))
             result["disabled"] = result["total"] - result["enabled"]
             result["missing_files"] = sum(1 for s in snippets if s.get("missing", False))
+            result["misaligned_blobs"] = sum(1 for s in snippets if "misaligned_blobs" in s)
 
         return result
 
+    def _rename_rule_references(self, old: str, new: str) -> None:
+        """Point other mappings' trigger rules at a renamed mapping"""
+        ref = re.compile(r'(?<![\w.-])' + re.escape(old) + r'(?![\w.-])')
+        for mapping in self.config["mappings"]:
+            if mapping.get("when"):
+                mapping["when"] = ref.sub(new, mapping["when"])
+
     def update(self, name: str, pattern: str = None, content: str = None,
-               file_path: str = None, enabled: bool = None, rename: str = None) -> Dict:
+               file_path: str = None, enabled: bool = None, rename: str = None,
+               when: str = None) -> Dict:
         """Update existing snippet"""
         # Find snippet
         existing = self._find_snippet(name)
@@ -377,6 +649,17 @@ class SnippetManager:
             changes["pattern"] = {"old": existing["pattern"], "new": pattern}
             existing["pattern"] = pattern
 
+        # Update trigger rule (empty string removes it)
+        if when is not None:
+            old_when = existing.get("when")
+            if when:
+                self._validate_rule(name, when)
+                existing["when"] = when
+            else:
+                existing.pop("when", None)
+            if old_when != (when or None):
+                changes["when"] = {"old": old_when, "new": when or None}
+
         # Update content
         content_updated = False
         if content is not None or file_path is not None:
@@ -391,11 +674,17 @@ class SnippetManager:
                 with open(source_path) as f:
                     content = f.read()
 
-            old_size = snippet_path.stat().st_size if snippet_path.exists() else 0
-            with open(snippet_path, 'w') as f:
-                f.write(content)
-            new_size = snippet_path.stat().st_size
-            changes["content"] = {"old_size": old_size, "new_size": new_size}
+            if "blobs" in existing:
+                # Written as a new blob below, once the verification hash is in
+                old_size = sum(self.blobs.size(d) for d in existing["blobs"]
+                               if d and self.blobs.exists(d))
+                changes["content"] = {"old_size": old_size}
+            else:
+                old_size = snippet_path.stat().st_size if snippet_path.exists() else 0
+                with open(snippet_path, 'w') as f:
+                    f.write(content)
+                new_size = snippet_path.stat().st_size
+                changes["content"] = {"old_size": old_size, "new_size": new_size}
             content_updated = True
 
         # Update enabled status
@@ -418,12 +707,23 @@ class SnippetManager:
                     {"name": rename}
                 )
 
-            # Rename file
-            if snippet_path.exists():
-                snippet_path.rename(new_snippet_path)
+            if "blobs" in existing:
+                # Blob-backed snippets only need the pointer updated; keep
+                # every file reference so snippet and blobs stay aligned
+                old_snippet_file = f"snippets/{name}.md"
+                existing["snippet"] = [new_snippet_file if f == old_snippet_file else f
+                                       for f in existing["snippet"]]
+                existing["name"] = rename
+            else:
+                # Rename file
+                if snippet_path.exists():
+                    snippet_path.rename(new_snippet_path)
 
-            # Update config (always use array format)
-            existing["snippet"] = [new_snippet_file]
+                # Update config (always use array format)
+                existing["snippet"] = [new_snippet_file]
+                if "name" in existing:
+                    existing["name"] = rename
+            self._rename_rule_references(name, rename)
             changes["name"] = {"old": name, "new": rename}
             name = rename
 
@@ -431,7 +731,23 @@ class SnippetManager:
         verification_hash = None
         if content_updated or pattern is not None:
             verification_hash = self._generate_verification_hash(name)
-            self._add_verification_hash(snippet_path if not rename else new_snippet_path, verification_hash)
+            if "blobs" in existing:
+                # Pointer swap: store the new body and repoint the mapping
+                if content_updated:
+                    existing["snippet"] = [f"snippets/{name}.md"]
+                    bodies = [content]
+                else:
+                    bodies = self._read_blobs(existing)
+                if bodies and bodies[0] is not None:
+                    bodies[0] = self._insert_verification_hash(bodies[0], verification_hash)
+                old_blobs = existing["blobs"]
+                existing["blobs"] = [self.blobs.put(body) if body is not None else None
+                                     for body in bodies]
+                changes["blobs"] = {"old": old_blobs, "new": existing["blobs"]}
+                if content_updated:
+                    changes["content"]["new_size"] = len(bodies[0].encode("utf-8"))
+            else:
+                self._add_verification_hash(snippet_path if not rename else new_snippet_path, verification_hash)
 
         self._save_config()
 
@@ -459,9 +775,10 @@ class SnippetManager:
         snippet_path = self._get_snippet_path(name)
         deleted_files = []
         backup_location = None
+        blob_backed = "blobs" in existing
 
         # Create backup if requested
-        if backup and snippet_path.exists():
+        if backup and (blob_backed or snippet_path.exists()):
             if backup_dir:
                 backup_base = Path(backup_dir)
             else:
@@ -471,10 +788,17 @@ class SnippetManager:
             backup_location = backup_base / f"{timestamp}_{name}"
             backup_location.mkdir(parents=True, exist_ok=True)
 
-            shutil.copy2(snippet_path, backup_location / f"{name}.md")
+            if blob_backed:
+                bodies = [body for body in self._read_blobs(existing) if body is not None]
+                for i, body in enumerate(bodies):
+                    suffix = f"_{i + 1}" if len(bodies) > 1 else ""
+                    with open(backup_location / f"{name}{suffix}.md", 'w') as f:
+                        f.write(body)
+            else:
+                shutil.copy2(snippet_path, backup_location / f"{name}.md")
 
-        # Delete snippet file
-        if snippet_path.exists():
+        # Delete snippet file (blobs stay until `gc` finds them unreferenced)
+        if not blob_backed and snippet_path.exists():
             snippet_path.unlink()
             deleted_files.append(str(snippet_path))
 
@@ -485,18 +809,153 @@ class SnippetManager:
         ]
         self._save_config()
 
-        return {
+        # Rules that referenced this mapping no longer compile
+        _, rule_errors = snippet_rules.compile_mappings(self.config["mappings"])
+
+        result = {
             "deleted": deleted_files,
             "backup_location": str(backup_location) if backup_location else None,
-            "config_updated": True
+            "config_updated": True,
+            "broken_rules": sorted(rule_errors)
         }
+        if blob_backed:
+            counts = refcounts(self.config["mappings"])
+            result["unreferenced_blobs"] = [d for d in existing["blobs"] if d and not counts[d]]
+        return result
+
+    def _mapping_sources(self, mapping: Dict) -> List[Dict]:
+        """Every body a mapping injects: logical file, path on disk, blob digest"""
+        if "blobs" in mapping:
+            return [{"file": f, "path": self.blobs.path(d), "blob": d} if d else
+                    {"file": f, "path": str(self.snippets_dir.parent / f), "blob": None}
+                    for f, d in self._blob_pairs(mapping)]
+        return [{"file": f, "path": str(self.snippets_dir.parent / f), "blob": None}
+                for f in mapping["snippet"]]
 
-    def validate(self) -> Dict:
+    def _validation_cache_path(self) -> Path:
+        return self._artifact_path().parent / "validate.json"
+
+    def _deep_validate(self, jobs: Optional[int]) -> Dict:
+        """Run deep checks per mapping in a worker pool, cached by content hash"""
+        limits = dict(DEFAULT_LIMITS)
+        limits.update(self.config.get("limits") or {})
+
+        cache_path = self._validation_cache_path()
+        try:
+            with open(cache_path) as f:
+                cache = json.load(f)
+            if cache.get("version") != DEEP_CHECK_VERSION:
+                raise ValueError("stale cache version")
+        except (FileNotFoundError, ValueError):
+            cache = {"version": DEEP_CHECK_VERSION, "files": {}, "mappings": {}}
+
+        def content_hash(path: str) -> Optional[str]:
+            # Reuse the stored hash while the file's stat is unchanged
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                return None
+            stamp = [st.st_mtime_ns, st.st_size]
+            cached = cache["files"].get(path)
+            if cached and cached[:2] == stamp:
+                return cached[2]
+            with open(path, 'rb') as f:
+                file_digest = digest(f.read())
+            cache["files"][path] = stamp + [file_digest]
+            return file_digest
+
+        results = {}
+        pending = []
+        misaligned = []
+        live_paths = set()
+        for mapping in self.config["mappings"]:
+            try:
+                sources = self._mapping_sources(mapping)
+            except SnippetError as e:
+                misaligned.append({
+                    "type": "misaligned_blobs",
+                    "snippet": mapping["snippet"],
+                    "details": e.details
+                })
+                continue
+            live_paths.update(source["path"] for source in sources)
+            key = digest(json.dumps([
+                DEEP_CHECK_VERSION,
+                mapping["pattern"],
+                sources,
+                [content_hash(source["path"]) for source in sources],
+                limits
+            ], sort_keys=True))
+            if key not in cache["mappings"]:
+                pending.append((key, {
+                    "snippet": mapping["snippet"],
+                    "pattern": mapping["pattern"],
+                    "sources": sources,
+                    "limits": limits,
+                    "base_dir": self.base_dir
+                }))
+            results[key] = None
+
+        # Spread uncached mappings over a process pool (regex work holds the GIL)
+        workers = min(jobs or os.cpu_count() or 1, len(pending))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                checked = list(pool.map(_deep_check, [job for _, job in pending]))
+        else:
+            checked = [_deep_check(job) for _, job in pending]
+        for (key, _), issues in zip(pending, checked):
+            cache["mappings"][key] = issues
+
+        # Probe timings depend on load, so a slow_pattern from an earlier run
+        # (or from parallel workers competing for CPU) is probed again alone
+        # before it is reported
+        confirm = set(results) if workers > 1 else set(results) - {key for key, _ in pending}
+        reprobed = 0
+        for key in confirm:
+            issues = cache["mappings"][key]
+            for index, issue in enumerate(issues):
+                if issue["type"] != "slow_pattern":
+                    continue
+                reprobed += 1
+                pattern = issue["details"]["pattern"]
+                slow = _probe_pattern(re.compile(pattern, re.IGNORECASE),
+                                      limits["probe_budget_ms"])
+                if slow:
+                    issues[index] = dict(issue, details=dict(
+                        slow, pattern=pattern, budget_ms=limits["probe_budget_ms"]))
+                else:
+                    del issues[index]
+                break
+
+        # Keep only entries for the current config and files
+        cache["mappings"] = {key: cache["mappings"][key] for key in results}
+        cache["files"] = {p: v for p, v in cache["files"].items() if p in live_paths}
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_path, 'w') as f:
+            json.dump(cache, f)
+
+        return {
+            "issues": misaligned + [issue for key in cache["mappings"]
+                                    for issue in cache["mappings"][key]],
+            "mappings_checked": len(pending),
+            "cache_hits": len(results) - len(pending),
+            "reprobed": reprobed,
+            "workers": max(workers, 1),
+            "limits": limits
+        }
+
+    def validate(self, deep: bool = False, jobs: int = None) -> Dict:
         """Validate configuration and files"""
+        start = time.perf_counter()
         issues = []
+        deep_result = None
+
+        if deep:
+            deep_result = self._deep_validate(jobs)
+            issues.extend(deep_result.pop("issues"))
 
         # Validate each mapping
-        for mapping in self.config["mappings"]:
+        for mapping in self.config["mappings"] if not deep else []:
             # Check pattern
             try:
                 self._validate_pattern(mapping["pattern"])
@@ -507,14 +966,32 @@ class SnippetManager:
                     "details": e.details
                 })
 
-            # Check file exists
-            snippet_path = self.snippets_dir.parent / mapping["snippet"]
-            if not snippet_path.exists():
+            # Check every referenced file (or blob) exists
+            try:
+                sources = self._mapping_sources(mapping)
+            except SnippetError as e:
                 issues.append({
-                    "type": "missing_file",
+                    "type": "misaligned_blobs",
                     "snippet": mapping["snippet"],
-                    "path": str(snippet_path)
+                    "details": e.details
                 })
+                continue
+            for source in sources:
+                if not os.path.exists(source["path"]):
+                    issues.append({
+                        "type": "missing_blob" if source["blob"] else "missing_file",
+                        "snippet": mapping["snippet"],
+                        "path": source["path"]
+                    })
+
+        # Check trigger rules compile against known mapping names
+        _, rule_errors = snippet_rules.compile_mappings(self.config["mappings"])
+        for rule_name, message in rule_errors.items():
+            issues.append({
+                "type": "invalid_rule",
+                "snippet": rule_name,
+                "details": {"message": message}
+            })
 
         # Check for duplicate patterns
         patterns_seen = {}
@@ -529,11 +1006,15 @@ class SnippetManager:
             else:
                 patterns_seen[pattern] = mapping["snippet"]
 
-        return {
+        result = {
             "config_valid": len(issues) == 0,
-            "files_checked": len(self.config["mappings"]),
+            "files_checked": sum(len(m["snippet"]) for m in self.config["mappings"]),
             "issues": issues
         }
+        if deep_result:
+            result["deep"] = deep_result
+            result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        return result
 
     def test(self, name: str, text: str) -> Dict:
         """Test if pattern matches text"""
@@ -548,14 +1029,598 @@ class SnippetManager:
         pattern = existing["pattern"]
         matches = re.findall(pattern, text, re.IGNORECASE)
 
-        return {
+        # Evaluate the trigger rule over the same shared match set the hook uses
+        mappings = self.config["mappings"]
+        graph, rule_errors = snippet_rules.compile_mappings(mappings)
+        rule_name = self._mapping_key(existing)
+        patterns = {key: mapping["pattern"] for key, mapping
+                    in zip(snippet_rules.mapping_keys(mappings), mappings)}
+        match_set = snippet_rules.MatchSet(text, patterns)
+
+        result = {
             "name": name,
             "pattern": pattern,
             "text": text,
             "matches": matches,
             "match_count": len(matches),
-            "matched": len(matches) > 0
+            "matched": len(matches) > 0,
+            "when": existing.get("when"),
+            "enabled": existing.get("enabled", True)
+        }
+
+        if rule_name in rule_errors:
+            result["fired"] = False
+            result["rule_error"] = rule_errors[rule_name]
+            return result
+
+        trace = snippet_rules.explain(graph.nodes, graph.roots[rule_name], match_set)
+        result["fired"] = trace["value"] and result["enabled"]
+        result["explanation"] = snippet_rules.describe(trace)
+        result["trace"] = trace
+        return result
+
+    def storage(self, mode: str) -> Dict:
+        """Switch between loose snippet files, the content-addressed blob store,
+        and blobs compressed against a dictionary trained on the library"""
+        if mode not in ("files", "blobs", "compressed"):
+            raise SnippetError("INVALID_INPUT", f"Unknown storage mode '{mode}'",
+                               {"mode": mode, "choices": ["files", "blobs", "compressed"]})
+
+        if mode == "files":
+            # Check every mapping first so no file is written for a partial switch
+            misaligned = []
+            for mapping in self.config["mappings"]:
+                if "blobs" in mapping:
+                    try:
+                        self._blob_pairs(mapping)
+                    except SnippetError:
+                        misaligned.append(self._mapping_key(mapping))
+            if misaligned:
+                raise SnippetError(
+                    "CONFIG_ERROR",
+                    f"Fix misaligned blobs before switching to files: {', '.join(misaligned)}",
+                    {"misaligned_blobs": misaligned}
+                )
+
+        converted = []
+        missing_files = []
+
+        for mapping in self.config["mappings"]:
+            name = snippet_rules.mapping_name(mapping)
+            if mode != "files" and "blobs" not in mapping:
+                # Missing files keep their reference with a null digest (they
+                # show up in `validate`); the mapping definition is unchanged
+                digests = []
+                for snippet_file in mapping["snippet"]:
+                    snippet_path = self.snippets_dir.parent / snippet_file
+                    if not snippet_path.exists():
+                        missing_files.append(snippet_file)
+                        digests.append(None)
+                        continue
+                    with open(snippet_path) as f:
+                        digests.append(self.blobs.put(f.read()))
+                mapping["blobs"] = digests
+                converted.append(name)
+
+            elif mode == "files" and "blobs" in mapping:
+                for snippet_file, blob_digest in self._blob_pairs(mapping):
+                    if not blob_digest:
+                        continue
+                    snippet_path = self.snippets_dir.parent / snippet_file
+                    body = self.blobs.get(blob_digest)
+                    snippet_path.parent.mkdir(parents=True, exist_ok=True)
+                    if not snippet_path.exists() or snippet_path.read_text() != body:
+                        snippet_path.write_text(body)
+                del mapping["blobs"]
+                converted.append(name)
+
+        compression = None
+        if mode == "compressed":
+            compression = self._train_compression()
+        elif self.config.get("compression") and mode == "blobs":
+            # Leaving compressed storage: store every referenced body raw again
+            for blob_digest in refcounts(self.config["mappings"]):
+                if self.blobs.exists(blob_digest):
+                    self.blobs.recode(blob_digest, None)
+
+        if mode == "files":
+            self.config.pop("storage", None)
+        else:
+            self.config["storage"] = "blobs"
+        if compression:
+            self.config["compression"] = compression
+        else:
+            self.config.pop("compression", None)
+        self.blobs.compression = self._compression()
+        self._save_config()
+
+        counts = refcounts(self.config["mappings"])
+        result = {
+            "storage": mode,
+            "converted": converted,
+            "missing_files": missing_files,
+            "blobs_referenced": len(counts),
+            "blob_references": sum(counts.values())
         }
+        if compression:
+            result["compression"] = self._compression_stats()
+        return result
+
+    def _train_compression(self) -> Dict:
+        """Train a dictionary on every referenced body and recompress with it.
+
+        Re-running `storage compressed` retrains; the previous dictionary is
+        left for `gc` once nothing uses it.
+        """
+        digests = [d for d in refcounts(self.config["mappings"]) if self.blobs.exists(d)]
+        bodies = [self.blobs.read_bytes(d) for d in digests]
+        zdict_digest = self.blobs.put(train_zdict(bodies), raw=True)
+
+        compression = dict(DEFAULT_COMPRESSION)
+        compression.update(self.config.get("compression") or {})
+        compression["dict"] = zdict_digest
+        for blob_digest in digests:
+            self.blobs.recode(blob_digest, compression)
+        return compression
+
+    def _compression_stats(self) -> Dict:
+        """Body bytes vs on-disk bytes for every referenced blob"""
+        compression = self._compression() or {}
+        raw_bytes = stored_bytes = compressed = 0
+        for blob_digest in refcounts(self.config["mappings"]):
+            if not self.blobs.exists(blob_digest):
+                continue
+            raw_bytes += self.blobs.size(blob_digest)
+            stored_bytes += self.blobs.disk_size(blob_digest)
+            with open(self.blobs.path(blob_digest), 'rb') as f:
+                compressed += is_compressed(f.read(len(MAGIC)))
+        dict_bytes = (self.blobs.disk_size(compression["dict"])
+                      if compression.get("dict") and self.blobs.exists(compression["dict"])
+                      else 0)
+        return {
+            "codec": compression.get("codec"),
+            "dict": compression.get("dict"),
+            "dict_bytes": dict_bytes,
+            "raw_bytes": raw_bytes,
+            "stored_bytes": stored_bytes,
+            "blobs_compressed": compressed,
+            "ratio": round(raw_bytes / stored_bytes, 3) if stored_bytes else None,
+            "ratio_with_dict": (round(raw_bytes / (stored_bytes + dict_bytes), 3)
+                                if stored_bytes else None)
+        }
+
+    def gc(self, dry_run: bool = False) -> Dict:
+        """Remove unreferenced blobs and stale session state"""
+        counts = refcounts(self.config["mappings"], self._compression())
+        stored = list(self.blobs)
+
+        # A kept blob may still be compressed against an older dictionary
+        # (e.g. after switching storage modes); keep whatever it names
+        keep = {d for d, count in counts.items() if count}
+        for blob_digest in stored:
+            if blob_digest in keep:
+                with open(self.blobs.path(blob_digest), 'rb') as f:
+                    header = f.read(len(MAGIC) + 64)
+                if is_compressed(header):
+                    keep.add(header[len(MAGIC):].decode("ascii"))
+        removed = []
+        bytes_freed = 0
+
+        for blob_digest in stored:
+            if blob_digest in keep:
+                continue
+            bytes_freed += self.blobs.disk_size(blob_digest)
+            removed.append(blob_digest)
+            if not dry_run:
+                self.blobs.delete(blob_digest)
+
+        sessions_removed = 0
+        if not dry_run:
+            settings = snippet_session.settings(self.config)
+            sessions_dir = self._artifact_path().parent / snippet_session.SESSIONS_DIRNAME
+            sessions_removed = snippet_session.gc(str(sessions_dir), settings["ttl_hours"])
+
+        return {
+            "dry_run": dry_run,
+            "blobs_stored": len(stored),
+            "blobs_referenced": len(counts),
+            "blobs_shared": sum(1 for c in counts.values() if c > 1),
+            "removed": removed,
+            "bytes_freed": bytes_freed,
+            "sessions_removed": sessions_removed
+        }
+
+    def _manifest_path(self) -> Path:
+        """Content hashes of referenced snippet files, as last seen by watch"""
+        return self._artifact_path().parent / "manifest.json"
+
+    def _load_manifest(self) -> Dict:
+        try:
+            with open(self._manifest_path()) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"files": {}}
+
+    def _save_manifest(self, manifest: Dict) -> None:
+        self._manifest_path().parent.mkdir(parents=True, exist_ok=True)
+        with open(self._manifest_path(), 'w') as f:
+            json.dump(manifest, f, indent=2)
+            f.write('\n')
+
+    def _file_references(self) -> Dict[str, List[Dict]]:
+        """Snippet file (config-relative path) -> mappings that reference it"""
+        references = {}
+        for mapping in self.config["mappings"]:
+            for snippet_file in mapping["snippet"]:
+                references.setdefault(snippet_file, []).append(mapping)
+        return references
+
+    def _update_test_expectation(self, name: str, verification_hash: str) -> Optional[str]:
+        """Point tests/<name>_test.sh at a snippet's current verification hash"""
+        test_path = self.snippets_dir.parent / "tests" / f"{name}_test.sh"
+        if not test_path.exists():
+            return None
+        with open(test_path) as f:
+            script = f.read()
+        updated = re.sub(r'^VERIFICATION_HASH="[^"]*"',
+                         f'VERIFICATION_HASH="{verification_hash}"', script, flags=re.M)
+        updated = re.sub(r'^# Verification Hash: .*$',
+                         f'# Verification Hash: {verification_hash}', updated, flags=re.M)
+        if updated == script:
+            return None
+        with open(test_path, 'w') as f:
+            f.write(updated)
+        return str(test_path)
+
+    def _rebuild_config(self) -> Dict:
+        """Reload config.json, check structure, patterns and rules, recompile
+        the artifact. An invalid edit raises SnippetError and leaves the last
+        good config in place."""
+        config = self._load_config()
+        self._validate_structure(config)
+        for mapping in config["mappings"]:
+            self._validate_pattern(mapping["pattern"])
+        _, rule_errors = snippet_rules.compile_mappings(config["mappings"])
+        if rule_errors:
+            raise SnippetError(
+                "INVALID_RULE",
+                f"Invalid trigger rule(s): {', '.join(sorted(rule_errors))}",
+                {"rule_errors": rule_errors}
+            )
+        self.config = config
+        self.blobs.compression = self._compression()
+        compiled = self._write_artifact()
+        return {"artifact": str(self._artifact_path()), "mappings": len(compiled["entries"])}
+
+    def _validate_structure(self, config: Dict) -> None:
+        """Check the shape of a hand-edited config before anything indexes it"""
+        if not isinstance(config, dict) or not isinstance(config.get("mappings"), list):
+            raise SnippetError("CONFIG_ERROR", "Config must be an object with a \"mappings\" list",
+                               {"path": str(self.config_path)})
+        for index, mapping in enumerate(config["mappings"]):
+            problem = None
+            if not isinstance(mapping, dict):
+                problem = "is not an object"
+            elif not isinstance(mapping.get("pattern"), str):
+                problem = "needs a \"pattern\" string"
+            elif (not isinstance(mapping.get("snippet"), list)
+                  or not all(isinstance(f, str) for f in mapping["snippet"])):
+                problem = "needs a \"snippet\" list of file paths"
+            elif "blobs" in mapping and (not isinstance(mapping["blobs"], list)
+                                         or len(mapping["blobs"]) != len(mapping["snippet"])):
+                problem = "has a \"blobs\" list that doesn't match \"snippet\""
+            elif "when" in mapping and not isinstance(mapping["when"], str):
+                problem = "has a non-string \"when\" rule"
+            if problem:
+                raise SnippetError(
+                    "CONFIG_ERROR",
+                    f"Mapping #{index} {problem}",
+                    {"index": index, "mapping": mapping}
+                )
+
+    def _rebuild_snippet(self, snippet_file: str, mappings: List[Dict],
+                         manifest: Dict) -> Optional[Dict]:
+        """Bring derived data for one edited snippet file up to date.
+
+        Returns None if its content is unchanged since the manifest entry.
+        """
+        snippet_path = self.snippets_dir.parent / snippet_file
+        names = [snippet_rules.mapping_name(m) for m in mappings]
+        if not snippet_path.exists():
+            manifest["files"].pop(snippet_file, None)
+            if any("blobs" in m for m in mappings):
+                # Blob-backed mappings still have their body
+                return None
+            raise SnippetError(
+                "FILE_ERROR",
+                f"Snippet file missing: {snippet_file}",
+                {"path": str(snippet_path), "referenced_by": names}
+            )
+
+        data = snippet_path.read_bytes()
+        try:
+            text = data.decode("utf-8")
+        except UnicodeDecodeError as e:
+            raise SnippetError(
+                "ENCODING_ERROR",
+                f"Snippet file is not valid UTF-8: {snippet_file}",
+                {"path": str(snippet_path), "error": str(e)}
+            )
+
+        content_digest = digest(data)
+        previous = manifest["files"].get(snippet_file)
+        manifest["files"][snippet_file] = {"sha256": content_digest, "size": len(data)}
+        # A file that was missing when its mapping moved into the blob store
+        # has no blob yet, so its first sighting is already an edit
+        awaiting_blob = any(
+            f == snippet_file and d is None
+            for m in mappings if "blobs" in m for f, d in self._blob_pairs(m)
+        )
+        if previous is None and not awaiting_blob:
+            # First sighting only records a baseline; in blob mode the file may
+            # be an older working copy than the blob it was migrated into
+            return None
+        if previous is not None and previous["sha256"] == content_digest:
+            return None
+
+        result = {"file": snippet_file, "mappings": names, "size_bytes": len(data)}
+
+        # Blob-backed mappings: store the edited body and swap the pointer
+        repointed = []
+        for mapping in mappings:
+            if "blobs" not in mapping:
+                continue
+            new_digest = self.blobs.put(text)
+            for index, (f, d) in enumerate(self._blob_pairs(mapping)):
+                if f == snippet_file and d != new_digest:
+                    mapping["blobs"][index] = new_digest
+                    if self._mapping_key(mapping) not in repointed:
+                        repointed.append(self._mapping_key(mapping))
+        if repointed:
+            result["repointed"] = repointed
+
+        # Test scripts embed the verification hash they expect to see
+        match = re.search(r'VERIFICATION_HASH:\*{0,2}\s*`([^`]+)`', text)
+        if match:
+            updated_tests = [t for t in (self._update_test_expectation(n, match.group(1))
+                                         for n in names) if t]
+            if updated_tests:
+                result["tests_updated"] = updated_tests
+
+        return result
+
+    def watch(self, report, debounce_ms: int = 200, once: bool = False,
+              exit_on_error: bool = False) -> Dict:
+        """Keep derived data in sync with hand edits to config and snippets.
+
+        report(success, data, message, error) is called once per rebuild.
+        """
+        config_path = os.path.abspath(self.config_path)
+        snippets_root = os.path.abspath(self.snippets_dir)
+        manifest = self._load_manifest()
+        own_config_stat = None
+
+        def rebuild(config_changed: bool, changed_files: set) -> int:
+            """Rebuild what the changed paths affect; returns the error count"""
+            nonlocal own_config_stat
+            start = time.perf_counter()
+            data = {"config": None, "snippets": [], "errors": []}
+
+            if config_changed:
+                try:
+                    data["config"] = self._rebuild_config()
+                except SnippetError as e:
+                    report(False, None, None, e)
+                    if exit_on_error:
+                        raise
+                    return 1
+                # Newly referenced files need checking too
+                changed_files |= set(self._file_references()) - set(manifest["files"])
+
+            references = self._file_references()
+            for snippet_file in sorted(changed_files):
+                if snippet_file not in references:
+                    continue
+                try:
+                    result = self._rebuild_snippet(snippet_file, references[snippet_file], manifest)
+                except SnippetError as e:
+                    report(False, None, None, e)
+                    data["errors"].append(e.code)
+                    if exit_on_error:
+                        raise
+                    continue
+                if result:
+                    data["snippets"].append(result)
+
+            if any("repointed" in r for r in data["snippets"]):
+                self._save_config()
+                own_config_stat = snippet_artifact.config_stat(self.config_path)
+            self._save_manifest(manifest)
+
+            if data["config"] is not None or data["snippets"]:
+                data["latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+                rebuilt = (["config"] if data["config"] else []) + [r["file"] for r in data["snippets"]]
+                report(True, data, f"Rebuilt {', '.join(rebuilt)} in {data['latency_ms']}ms", None)
+            return len(data["errors"])
+
+        # Full pass first, so the manifest reflects the tree as it is now
+        errors = rebuild(True, set(self._file_references()))
+        if once:
+            if errors:
+                raise SnippetError(
+                    "WATCH_ERRORS",
+                    f"{errors} invalid edit(s) found",
+                    {"errors": errors}
+                )
+            return {"manifest": str(self._manifest_path()), "files": len(manifest["files"])}
+
+        watcher = snippet_watch.open_watcher([os.path.dirname(config_path)],
+                                             recursive=[snippets_root])
+        report(True, {"backend": watcher.backend, "config": config_path,
+                      "snippets_dir": snippets_root}, "Watching for changes", None)
+        try:
+            for paths in snippet_watch.batches(watcher, debounce_ms / 1000):
+                config_changed = False
+                if config_path in paths:
+                    stat = None
+                    try:
+                        stat = snippet_artifact.config_stat(config_path)
+                    except FileNotFoundError:
+                        pass
+                    # Skip the echo of our own save after repointing blobs
+                    config_changed = stat != own_config_stat
+                    own_config_stat = None
+                changed_files = {
+                    os.path.relpath(p, self.base_dir).replace(os.sep, "/")
+                    for p in paths
+                    if p.startswith(snippets_root + os.sep)
+                }
+                if config_changed or changed_files:
+                    rebuild(config_changed, changed_files)
+        finally:
+            watcher.close()
+
+    def compile(self) -> Dict:
+        """Compile config into the hook's precompiled artifact"""
+        if not self.config_path.exists():
+            raise SnippetError(
+                "CONFIG_ERROR",
+                "Config file not found",
+                {"path": str(self.config_path)}
+            )
+        start = time.perf_counter()
+        compiled = self._write_artifact()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        artifact = self._artifact_path()
+
+        return {
+            "artifact": str(artifact),
+            "size_bytes": artifact.stat().st_size,
+            "mappings": len(compiled["entries"]),
+            "rule_nodes": len(compiled["nodes"]),
+            "rule_errors": compiled["rule_errors"],
+            "compile_ms": round(elapsed_ms, 3)
+        }
+
+    def _import_profile(self, cmd: List[str], stdin: str,
+                        env: Optional[Dict] = None) -> Dict[str, int]:
+        """Per-module self import time (us) from python -X importtime"""
+        proc = subprocess.run(
+            [cmd[0], "-X", "importtime"] + cmd[1:],
+            input=stdin, capture_output=True, text=True, env=env
+        )
+        profile = {}
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, _, module = line[len("import time:"):].split("|")
+            profile[module.strip()] = int(self_us)
+        return profile
+
+    def bench(self, prompt: str, runs: int = 20) -> Dict:
+        """Measure hook cold start against the interpreter baseline"""
+        hook = Path(__file__).parent / "snippet-injector.py"
+        stdin = json.dumps({"prompt": prompt})
+        hook_cmd = [sys.executable, str(hook)]
+        baseline_cmd = [sys.executable, "-c", "pass"]
+        compression = self._compression()
+
+        def timed(cmd: List[str], env: Optional[Dict] = None) -> float:
+            start = time.perf_counter()
+            subprocess.run(cmd, input=stdin, capture_output=True, text=True, env=env)
+            return (time.perf_counter() - start) * 1000
+
+        # Hook runs keep their hot cache in scratch directories, so benchmarking
+        # never promotes bodies or shifts eviction for real prompts. Each cold
+        # run gets an empty one (bodies are decompressed on match); hot runs
+        # share one warmed past hot_after
+        with tempfile.TemporaryDirectory() as scratch:
+            def scratch_env(name: str) -> Dict:
+                return dict(os.environ, **{HOT_DIR_ENV: os.path.join(scratch, name)})
+
+            # One unmeasured run so the artifact and bytecode exist
+            timed(hook_cmd, scratch_env("warmup"))
+            baseline = [timed(baseline_cmd) for _ in range(runs)]
+            samples = [timed(hook_cmd, scratch_env(f"cold{i}")) for i in range(runs)]
+            hot_samples = None
+            if compression:
+                hot_env = scratch_env("hot")
+                for _ in range(compression.get("hot_after", DEFAULT_COMPRESSION["hot_after"])):
+                    timed(hook_cmd, hot_env)
+                hot_samples = [timed(hook_cmd, hot_env) for _ in range(runs)]
+
+            # Imports the hook adds beyond interpreter startup, json and re
+            startup = self._import_profile([sys.executable, "-c", IMPORT_BASELINE], stdin)
+            hook_imports = {
+                module: us for module, us in
+                self._import_profile(hook_cmd, stdin, scratch_env("profile")).items()
+                if module not in startup
+            }
+        import_ms = sum(hook_imports.values()) / 1000
+
+        def summary(values: List[float]) -> Dict:
+            ordered = sorted(values)
+            return {
+                "min_ms": round(ordered[0], 3),
+                "median_ms": round(statistics.median(ordered), 3),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3)
+            }
+
+        overhead_ms = statistics.median(samples) - statistics.median(baseline)
+        result = {
+            "prompt": prompt,
+            "runs": runs,
+            "hook": summary(samples),
+            "interpreter": summary(baseline),
+            "overhead_ms": round(overhead_ms, 3),
+            "budget_ms": HOOK_BUDGET_MS,
+            "within_budget": overhead_ms <= HOOK_BUDGET_MS,
+            "import_ms": round(import_ms, 3),
+            "import_budget_ms": IMPORT_BUDGET_MS,
+            "imports": sorted(hook_imports, key=hook_imports.get, reverse=True),
+            "artifact_fresh": snippet_artifact.load_artifact(
+                str(self._artifact_path()), self.base_dir, str(self.config_path)
+            ) is not None
+        }
+        if compression:
+            result["hook_hot"] = summary(hot_samples)
+            result["compression"] = self._bench_decompression(prompt, runs)
+        return result
+
+    def _bench_decompression(self, prompt: str, runs: int) -> Dict:
+        """Compression ratio, and what decompressing the bodies that fire on
+        prompt costs per injection (cold: dictionary read plus inflate, as
+        the hook does on a hot-cache miss)"""
+        mappings = self.config["mappings"]
+        keyed = list(zip(snippet_rules.mapping_keys(mappings), mappings))
+        enabled = [(key, m) for key, m in keyed if m.get("enabled", True)]
+        graph, _ = snippet_rules.compile_mappings(mappings)
+        results = snippet_rules.fired(
+            graph.nodes, graph.roots, [key for key, _ in enabled],
+            snippet_rules.MatchSet(prompt, {key: m["pattern"] for key, m in keyed})
+        )
+        fired_digests = list(dict.fromkeys(
+            d for key, m in enabled if results.get(key)
+            for d in m.get("blobs", []) if d and self.blobs.exists(d)
+        ))
+
+        def inject() -> float:
+            start = time.perf_counter()
+            store = BlobStore(self.base_dir)
+            for blob_digest in fired_digests:
+                store.read_bytes(blob_digest)
+            return (time.perf_counter() - start) * 1000
+
+        samples = [inject() for _ in range(runs)] if fired_digests else [0.0]
+        hot_dir = self._artifact_path().parent / "hot"
+        stats = self._compression_stats()
+        stats.update({
+            "fired_blobs": len(fired_digests),
+            "fired_bytes": sum(self.blobs.size(d) for d in fired_digests),
+            "decompress_ms_per_injection": round(statistics.median(samples), 3),
+            "hot_cached": sum(1 for d in fired_digests if (hot_dir / d).exists())
+        })
+        return stats
 
 
 def format_output(success: bool, operation: str, data: Dict = None,
@@ -627,6 +1692,8 @@ def main():
                               help="Enable snippet (default: true)")
     create_parser.add_argument("--force", action="store_true",
                               help="Overwrite if exists")
+    create_parser.add_argument("--when",
+                              help="Trigger rule, e.g. 'self and not exa' (default: self)")
 
     # list
     list_parser = subparsers.add_parser("list", help="List snippets")
@@ -644,6 +1711,8 @@ def main():
     update_parser.add_argument("--file", help="Read new content from file")
     update_parser.add_argument("--enabled", type=bool, help="Enable/disable")
     update_parser.add_argument("--rename", help="Rename snippet")
+    update_parser.add_argument("--when",
+                              help="New trigger rule (empty string removes it)")
 
     # delete
     delete_parser = subparsers.add_parser("delete", help="Delete snippet")
@@ -657,6 +1726,43 @@ def main():
     # validate
     validate_parser = subparsers.add_parser("validate",
                                            help="Validate config and files")
+    validate_parser.add_argument("--deep", action="store_true",
+                                help="Probe patterns and check encodings/sizes (cached)")
+    validate_parser.add_argument("--jobs", type=int,
+                                help="Worker processes for --deep (default: CPU count)")
+
+    # storage
+    storage_parser = subparsers.add_parser("storage",
+                                          help="Switch snippet storage layout")
+    storage_parser.add_argument("mode", choices=["files", "blobs", "compressed"],
+                               help="files: loose .md files, blobs: content-addressed store, "
+                                    "compressed: blobs compressed with a trained dictionary")
+
+    # gc
+    gc_parser = subparsers.add_parser("gc", help="Remove unreferenced blobs")
+    gc_parser.add_argument("--dry-run", action="store_true",
+                          help="Report what would be removed")
+
+    # watch
+    watch_parser = subparsers.add_parser("watch",
+                                        help="Rebuild derived data on hand edits")
+    watch_parser.add_argument("--debounce-ms", type=int, default=200,
+                             help="Quiet period before rebuilding (default: 200)")
+    watch_parser.add_argument("--once", action="store_true",
+                             help="Run one full rebuild and exit")
+    watch_parser.add_argument("--exit-on-error", action="store_true",
+                             help="Exit on the first invalid edit")
+
+    # compile
+    compile_parser = subparsers.add_parser("compile",
+                                          help="Precompile config for the hook")
+
+    # bench
+    bench_parser = subparsers.add_parser("bench", help="Measure hook cold start")
+    bench_parser.add_argument("--prompt", default="Testing HTML with codex",
+                             help="Prompt to feed the hook")
+    bench_parser.add_argument("--runs", type=int, default=20,
+                             help="Number of timed runs (default: 20)")
 
     # test
     test_parser = subparsers.add_parser("test", help="Test pattern matching")
@@ -677,7 +1783,7 @@ def main():
             data = manager.create(
                 args.name, args.pattern, args.content, args.file,
                 getattr(args, 'files', None), args.separator,
-                args.enabled, args.force
+                args.enabled, args.force, args.when
             )
             print(format_output(True, "create", data,
                               f"Snippet '{args.name}' created successfully",
@@ -690,7 +1796,7 @@ def main():
         elif args.command == "update":
             data = manager.update(
                 args.name, args.pattern, args.content, args.file,
-                args.enabled, args.rename
+                args.enabled, args.rename, args.when
             )
             print(format_output(True, "update", data,
                               f"Snippet '{args.name}' updated successfully",
@@ -704,14 +1810,63 @@ def main():
                               format_type=args.format))
 
         elif args.command == "validate":
-            data = manager.validate()
+            data = manager.validate(args.deep, args.jobs)
             message = "All snippets valid" if data["config_valid"] else "Validation issues found"
             print(format_output(True, "validate", data, message,
                               format_type=args.format))
 
+        elif args.command == "storage":
+            data = manager.storage(args.mode)
+            print(format_output(True, "storage", data,
+                              f"Storage switched to {args.mode}",
+                              format_type=args.format))
+
+        elif args.command == "gc":
+            data = manager.gc(args.dry_run)
+            message = (f"{'Would remove' if args.dry_run else 'Removed'} "
+                       f"{len(data['removed'])} unreferenced blob(s)")
+            print(format_output(True, "gc", data, message,
+                              format_type=args.format))
+
+        elif args.command == "watch":
+            def report(success, data, message, error):
+                if success:
+                    print(format_output(True, "watch", data, message,
+                                      format_type=args.format), flush=True)
+                else:
+                    print(format_output(False, "watch", error=error,
+                                      format_type=args.format),
+                          file=sys.stderr, flush=True)
+
+            try:
+                data = manager.watch(report, args.debounce_ms, args.once,
+                                     args.exit_on_error)
+            except KeyboardInterrupt:
+                data = None
+            if args.once:
+                print(format_output(True, "watch", data, "Derived data up to date",
+                                  format_type=args.format))
+
+        elif args.command == "compile":
+            data = manager.compile()
+            print(format_output(True, "compile", data, "Config compiled",
+                              format_type=args.format))
+
+        elif args.command == "bench":
+            data = manager.bench(args.prompt, args.runs)
+            message = (f"Hook adds {data['overhead_ms']}ms over interpreter startup "
+                       f"(budget {data['budget_ms']}ms)")
+            if "compression" in data:
+                message += (f"; compression {data['compression']['ratio']}x, "
+                            f"{data['compression']['decompress_ms_per_injection']}ms "
+                            f"decompression per injection")
+            print(format_output(True, "bench", data, message,
+                              format_type=args.format))
+
         elif args.command == "test":
             data = manager.test(args.name, args.text)
-            message = f"Pattern {'matched' if data['matched'] else 'did not match'}"
+            message = (f"Pattern {'matched' if data['matched'] else 'did not match'}, "
+                       f"snippet {'fires' if data['fired'] else 'does not fire'}")
             print(format_output(True, "test", data, message,
                               format_type=args.format))
 
@@ -0,0 +1,143 @@
+#!/bin/bash
+# Test Suite: Content-addressed storage
+# Runs the CLI and hook against a throwaway snippets root and checks the
+# files <-> blobs round trip, body sharing, pointer swaps, gc reference
+# counting, multi-file renames and references to missing files.
+
+set -e
+
+SNIPPETS_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+WORK_DIR=$(mktemp -d)
+trap 'rm -rf "$WORK_DIR"' EXIT
+TESTS_PASSED=0
+TESTS_FAILED=0
+
+cp "$SNIPPETS_DIR"/*.py "$WORK_DIR"/
+mkdir -p "$WORK_DIR/snippets"
+echo "BODY-ALPHA" > "$WORK_DIR/snippets/alpha.md"
+echo "BODY-SHARED" > "$WORK_DIR/snippets/left.md"
+echo "BODY-SHARED" > "$WORK_DIR/snippets/right.md"
+echo "BODY-PART-ONE" > "$WORK_DIR/snippets/one.md"
+echo "BODY-PART-TWO" > "$WORK_DIR/snippets/two.md"
+echo "BODY-GHOST-KEPT" > "$WORK_DIR/snippets/kept.md"
+cat > "$WORK_DIR/config.json" <<'JSON'
+{
+  "mappings": [
+    {"name": "alpha", "pattern": "\\balpha\\b", "snippet": ["snippets/alpha.md"]},
+    {"name": "left", "pattern": "\\bleft\\b", "snippet": ["snippets/left.md"]},
+    {"name": "right", "pattern": "\\bright\\b", "snippet": ["snippets/right.md"]},
+    {"name": "ghost", "pattern": "\\bghost\\b", "snippet": ["snippets/kept.md", "snippets/ghost.md"]}
+  ]
+}
+JSON
+
+cli() { (cd "$WORK_DIR" && python3 snippets_cli.py "$@" 2>&1); }
+inject() { echo "{\"prompt\": \"$1\"}" | python3 "$WORK_DIR/snippet-injector.py" 2>/dev/null; }
+field() { python3 -c "import json, sys; d = json.load(sys.stdin); print($1)"; }
+mapping() { python3 -c "import json; print(json.dumps([m for m in json.load(open('$WORK_DIR/config.json'))['mappings'] if m['name'] == '$1'][0]$2))"; }
+blob_count() { find "$WORK_DIR/blobs" -type f | wc -l | tr -d ' '; }
+edit_config() {
+    python3 - "$WORK_DIR/config.json" "$1" <<'PY'
+import json, sys
+path = sys.argv[1]
+config = json.load(open(path))
+exec(sys.argv[2])
+json.dump(config, open(path, "w"), indent=2)
+PY
+}
+check() {
+    if eval "$2"; then
+        echo "  ✅ PASS: $1"
+        TESTS_PASSED=$((TESTS_PASSED + 1))
+    else
+        echo "  ❌ FAIL: $1"
+        TESTS_FAILED=$((TESTS_FAILED + 1))
+    fi
+}
+
+echo "🧪 Running Test Suite: Content-addressed storage"
+echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
+echo ""
+cli compile >/dev/null
+before=$(inject "alpha left ghost")
+
+# Test 1: Moving into the blob store
+echo "Test 1: Switching to blob storage..."
+result=$(cli storage blobs)
+check "Hook output unchanged" '[ "$(inject "alpha left ghost")" = "$before" ]'
+check "Identical bodies stored once ($(blob_count) blobs)" '[ "$(blob_count)" = "3" ]'
+check "Missing file reported, not dropped" \
+    '[ "$(echo "$result" | field "\" \".join(d[\"data\"][\"missing_files\"])")" = snippets/ghost.md ]'
+check "Missing file keeps its reference" \
+    '[ "$(mapping ghost "[\"snippet\"]")" = "[\"snippets/kept.md\", \"snippets/ghost.md\"]" ]'
+check "Missing file recorded as a null blob" '[[ $(mapping ghost "[\"blobs\"][1]") == null ]]'
+check "validate reports the missing file" '[[ $(cli validate) == *snippets/ghost.md* ]]'
+echo ""
+
+# Test 2: Updates swap pointers; gc removes only unreferenced blobs
+echo "Test 2: Pointer swaps and gc reference counting..."
+old_digest=$(mapping alpha '["blobs"][0]' | tr -d '"')
+cli update alpha --content "BODY-ALPHA-V2" >/dev/null
+check "Update stored a new blob" '[ "$(mapping alpha "[\"blobs\"][0]")" != "$old_digest" ]'
+check "Hook reads the new body" '[[ $(inject "alpha") == *BODY-ALPHA-V2* ]]'
+check "Dry run lists the unreferenced blob only" \
+    '[ "$(cli gc --dry-run | field "\" \".join(d[\"data\"][\"removed\"])")" = "$old_digest" ]'
+check "Dry run deletes nothing" '[ "$(blob_count)" = "4" ]'
+cli delete left --force --backup-dir "$WORK_DIR/backups" >/dev/null
+check "Deleting one sharer leaves the shared blob referenced" \
+    '[ "$(cli gc | field "\" \".join(d[\"data\"][\"removed\"])")" = "$old_digest" ]'
+check "gc removed only the unreferenced blob" '[ "$(blob_count)" = "3" ]'
+check "Remaining sharer still injects" '[[ $(inject "right") == *BODY-SHARED* ]]'
+echo ""
+
+# Test 3: Renaming a multi-file blob mapping keeps every body
+echo "Test 3: Renaming multi-file mappings..."
+cli create duo --pattern '\bduo\b' --files snippets/one.md snippets/two.md >/dev/null
+cli update duo --rename trio >/dev/null
+check "snippet keeps both files" '[ "$(mapping trio "[\"snippet\"]")" = "[\"snippets/one.md\", \"snippets/two.md\"]" ]'
+check "blobs stay aligned with snippet" '[ "$(mapping trio "[\"blobs\"]" | field "len(d)")" = "2" ]'
+check "Both bodies injected" '[[ $(inject "duo") == *BODY-PART-ONE*BODY-PART-TWO* ]]'
+echo ""
+
+# Test 4: A hand edit that misaligns blobs and snippet
+echo "Test 4: Handling misaligned blobs..."
+edit_config 'next(m for m in config["mappings"] if m["name"] == "alpha")["blobs"].append(None)'
+listing=$(cli list --show-stats)
+check "list still lists every mapping" \
+    '[ "$(echo "$listing" | field "len(d[\"data\"][\"snippets\"])")" = "4" ]'
+check "list flags the misaligned mapping" \
+    '[ "$(echo "$listing" | field "[s[\"name\"] for s in d[\"data\"][\"snippets\"] if \"misaligned_blobs\" in s]")" = "['"'"'alpha'"'"']" ]'
+check "Stats count it" '[ "$(echo "$listing" | field "d[\"data\"][\"misaligned_blobs\"]")" = "1" ]'
+check "Hook skips it instead of serving the stale loose file" '[ -z "$(inject "alpha")" ]'
+check "Other mappings still inject" '[[ $(inject "right") == *BODY-SHARED* ]]'
+check "storage files refuses before writing anything" \
+    '[[ $(cli storage files) == *CONFIG_ERROR*alpha* ]] && grep -qx BODY-ALPHA "$WORK_DIR/snippets/alpha.md"'
+edit_config 'next(m for m in config["mappings"] if m["name"] == "alpha")["blobs"].pop()'
+check "Fixing the lists restores the blob body" '[[ $(inject "alpha") == *BODY-ALPHA-V2* ]]'
+echo ""
+
+# Test 5: Back to loose files
+echo "Test 5: Switching back to files..."
+cli storage files >/dev/null
+check "blobs removed from mappings" '! grep -q "\"blobs\"" "$WORK_DIR/config.json"'
+check "Missing file reference restored" \
+    '[ "$(mapping ghost "[\"snippet\"]")" = "[\"snippets/kept.md\", \"snippets/ghost.md\"]" ]'
+check "Updated body written back to its file" 'grep -q BODY-ALPHA-V2 "$WORK_DIR/snippets/alpha.md"'
+check "Multi-file mapping still injects both parts" '[[ $(inject "duo") == *BODY-PART-ONE*BODY-PART-TWO* ]]'
+echo ""
+
+# Summary
+echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
+echo "Test Results:"
+echo "  ✅ Passed: $TESTS_PASSED"
+echo "  ❌ Failed: $TESTS_FAILED"
+echo "  📊 Total: $((TESTS_PASSED + TESTS_FAILED))"
+echo ""
+
+if [ $TESTS_FAILED -eq 0 ]; then
+    echo "🎉 All tests passed!"
+    exit 0
+else
+    echo "⚠️  Some tests failed. Please review the output above."
+    exit 1
+fi
@@ -0,0 +1,153 @@
+#!/bin/bash
+# Test Suite: Compressed storage
+# Runs the CLI and hook against a throwaway snippets root and checks that
+# compressed bodies inject byte-for-byte as before, the hot cache promotes
+# and evicts by fire count, session dedup skips decompression, corruption is
+# caught, and storage modes round-trip with gc keeping the dictionary alive.
+
+set -e
+
+SNIPPETS_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+WORK_DIR=$(mktemp -d)
+trap 'rm -rf "$WORK_DIR"' EXIT
+TESTS_PASSED=0
+TESTS_FAILED=0
+
+cp "$SNIPPETS_DIR"/*.py "$WORK_DIR"/
+mkdir -p "$WORK_DIR/snippets"
+for name in alpha beta gamma; do
+    {
+        echo "# BODY-$name"
+        for i in $(seq 40); do
+            echo "- Always run the full test suite before committing changes ($name $i)."
+            echo "- Prefer small, focused functions with clear names and docstrings."
+        done
+    } > "$WORK_DIR/snippets/$name.md"
+done
+cat > "$WORK_DIR/config.json" <<'JSON'
+{
+  "mappings": [
+    {"name": "alpha", "pattern": "\\balpha\\b", "snippet": ["snippets/alpha.md"]},
+    {"name": "beta", "pattern": "\\bbeta\\b", "snippet": ["snippets/beta.md"]},
+    {"name": "gamma", "pattern": "\\bgamma\\b", "snippet": ["snippets/gamma.md"]}
+  ]
+}
+JSON
+
+cli() { (cd "$WORK_DIR" && python3 snippets_cli.py "$@" 2>&1); }
+inject() { echo "{\"prompt\": \"$1\"${2:+, \"session_id\": \"$2\"}}" | python3 "$WORK_DIR/snippet-injector.py" 2>/dev/null; }
+field() { python3 -c "import json, sys; d = json.load(sys.stdin)['data']; print($1)"; }
+digest_of() { python3 -c "import hashlib; print(hashlib.sha256(open('$WORK_DIR/snippets/$1.md', 'rb').read()).hexdigest())"; }
+# Print an expression over the hot cache index ({'counts', 'hot'})
+hot_index() { python3 -c "import marshal; d = marshal.load(open('$WORK_DIR/.cache/hot/index.marshal', 'rb')); print($1)"; }
+edit_config() {
+    python3 - "$WORK_DIR/config.json" "$1" <<'PY'
+import json, sys
+path = sys.argv[1]
+config = json.load(open(path))
+exec(sys.argv[2])
+json.dump(config, open(path, "w"), indent=2)
+PY
+}
+check() {
+    if eval "$2"; then
+        echo "  ✅ PASS: $1"
+        TESTS_PASSED=$((TESTS_PASSED + 1))
+    else
+        echo "  ❌ FAIL: $1"
+        TESTS_FAILED=$((TESTS_FAILED + 1))
+    fi
+}
+
+echo "🧪 Running Test Suite: Compressed storage"
+echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
+echo ""
+cli compile >/dev/null
+before=$(inject "alpha beta gamma")
+alpha=$(digest_of alpha)
+beta=$(digest_of beta)
+gamma=$(digest_of gamma)
+
+# Test 1: Compressing keeps hashes and hook output
+echo "Test 1: Switching to compressed storage..."
+stats=$(cli storage compressed)
+dict=$(echo "$stats" | field "d['compression']['dict']")
+check "Every body compressed" '[ "$(echo "$stats" | field "d[\"compression\"][\"blobs_compressed\"]")" = "3" ]'
+check "Ratio above 1" '[ "$(echo "$stats" | field "d[\"compression\"][\"ratio\"] > 1")" = "True" ]'
+check "Blobs keep their uncompressed hashes" '[ -f "$WORK_DIR/blobs/${alpha:0:2}/${alpha:2}" ]'
+check "Stored with the compressed header" '[ "$(head -c 4 "$WORK_DIR/blobs/${alpha:0:2}/${alpha:2}")" = "SNZ1" ]'
+check "Hook output unchanged" '[ "$(inject "alpha beta gamma")" = "$before" ]'
+echo ""
+
+# Test 2: Hot cache promotion and eviction
+echo "Test 2: Promoting frequently fired bodies..."
+# The output check above was alpha's first fire
+inject "alpha" >/dev/null
+check "Not promoted before hot_after fires" '[ ! -f "$WORK_DIR/.cache/hot/$alpha" ]'
+inject "alpha" >/dev/null
+check "Promoted after hot_after (3) fires" '[ -f "$WORK_DIR/.cache/hot/$alpha" ]'
+check "Hot copy is the raw body" 'cmp -s "$WORK_DIR/.cache/hot/$alpha" "$WORK_DIR/snippets/alpha.md"'
+check "Hot output unchanged" '[ "$(inject "alpha beta gamma")" = "$before" ]'
+edit_config 'config["compression"]["hot_cache_bytes"] = 6000'
+for i in 1 2 3 4 5; do inject "beta" >/dev/null; done
+check "Hotter body evicts a colder one" \
+    '[ -f "$WORK_DIR/.cache/hot/$beta" ] && [ ! -f "$WORK_DIR/.cache/hot/$alpha" ]'
+check "Hot cache stays within hot_cache_bytes" '[ "$(hot_index "sum(d[\"hot\"].values()) <= 6000")" = "True" ]'
+check "No partial files left behind" '[ -z "$(find "$WORK_DIR/.cache/hot" -name "*.tmp")" ]'
+echo ""
+
+# Test 3: Session dedup skips bodies before decompressing them
+echo "Test 3: Deduplicating compressed bodies..."
+edit_config 'config["session"] = {"dedup": True, "reinject_after_turns": 0}'
+gamma_count=$(hot_index "d['counts'].get('$gamma', 0)")
+check "First prompt in a session injects" '[[ $(inject "gamma" s1) == *BODY-gamma* ]]'
+check "Repeat in the session is skipped" '[ -z "$(inject "gamma" s1)" ]'
+check "Skipped body was not read" '[ "$(hot_index "d[\"counts\"][\"$gamma\"]")" = "$((gamma_count + 1))" ]'
+edit_config 'del config["session"]'
+echo ""
+
+# Test 4: bench and deep validation understand compressed blobs
+echo "Test 4: Measuring and validating compressed blobs..."
+hot_before=$(cat "$WORK_DIR"/.cache/hot/* | cksum)
+bench=$(cli bench --runs 5 --prompt "alpha beta")
+check "bench leaves the hot cache and fire counts alone" '[ "$(cat "$WORK_DIR"/.cache/hot/* | cksum)" = "$hot_before" ]'
+check "bench times cold and hot hook runs separately" \
+    '[ "$(echo "$bench" | field "sorted(k for k in (\"hook\", \"hook_hot\") if \"median_ms\" in d[k])")" = "['"'"'hook'"'"', '"'"'hook_hot'"'"']" ]'
+check "bench counts the fired blobs" '[ "$(echo "$bench" | field "d[\"compression\"][\"fired_blobs\"]")" = "2" ]'
+check "bench reports decompress_ms_per_injection" \
+    '[ "$(echo "$bench" | field "\"decompress_ms_per_injection\" in d[\"compression\"]")" = "True" ]'
+blob="$WORK_DIR/blobs/${gamma:0:2}/${gamma:2}"
+cp "$blob" "$WORK_DIR/gamma.blob"
+head -c 80 "$WORK_DIR/gamma.blob" > "$blob"
+check "Truncated compressed blob flagged" \
+    '[ "$(cli validate --deep | field "\" \".join(i[\"type\"] for i in d[\"issues\"])")" = "corrupt_blob" ]'
+mv "$WORK_DIR/gamma.blob" "$blob"
+echo ""
+
+# Test 5: Round trips through the other layouts
+echo "Test 5: Leaving compressed storage..."
+check "gc keeps the dictionary while it is in use" '[ "$(cli gc | field "len(d[\"removed\"])")" = "0" ]'
+cli storage files >/dev/null
+check "Files mode output unchanged" '[ "$(inject "alpha beta gamma")" = "$before" ]'
+cli storage blobs >/dev/null
+check "Raw blobs output unchanged" '[ "$(inject "alpha beta gamma")" = "$before" ]'
+check "Blobs stored raw again" '[ "$(head -c 4 "$WORK_DIR/blobs/${alpha:0:2}/${alpha:2}")" != "SNZ1" ]'
+check "gc removes the unused dictionary" '[ "$(cli gc | field "\" \".join(d[\"removed\"])")" = "$dict" ]'
+check "Output unchanged after gc" '[ "$(inject "alpha beta gamma")" = "$before" ]'
+echo ""
+
+# Summary
+echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
+echo "Test Results:"
+echo "  ✅ Passed: $TESTS_PASSED"
+echo "  ❌ Failed: $TESTS_FAILED"
+echo "  📊 Total: $((TESTS_PASSED + TESTS_FAILED))"
+echo ""
+
+if [ $TESTS_FAILED -eq 0 ]; then
+    echo "🎉 All tests passed!"
+    exit 0
+else
+    echo "⚠️  Some tests failed. Please review the output above."
+    exit 1
+fi
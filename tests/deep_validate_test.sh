@@ -0,0 +1,133 @@
+#!/bin/bash
+# Test Suite: Deep validation
+# Runs `validate --deep` against a throwaway snippets root and checks pattern
+# probes, size and encoding limits, blob integrity, and that cached results
+# are reused only for mappings whose definition and files are unchanged.
+
+set -e
+
+SNIPPETS_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+WORK_DIR=$(mktemp -d)
+trap 'rm -rf "$WORK_DIR"' EXIT
+TESTS_PASSED=0
+TESTS_FAILED=0
+
+cp "$SNIPPETS_DIR"/*.py "$WORK_DIR"/
+mkdir -p "$WORK_DIR/snippets"
+echo "BODY-ALPHA" > "$WORK_DIR/snippets/alpha.md"
+echo "BODY-BETA" > "$WORK_DIR/snippets/beta.md"
+echo "BODY-GAMMA" > "$WORK_DIR/snippets/gamma.md"
+cat > "$WORK_DIR/config.json" <<'JSON'
+{
+  "mappings": [
+    {"name": "alpha", "pattern": "\\balpha\\b", "snippet": ["snippets/alpha.md"]},
+    {"name": "beta", "pattern": "\\bbeta\\b", "snippet": ["snippets/beta.md"]},
+    {"name": "gamma", "pattern": "\\bgamma\\b", "snippet": ["snippets/gamma.md"]}
+  ]
+}
+JSON
+
+cli() { (cd "$WORK_DIR" && python3 snippets_cli.py "$@" 2>&1); }
+# Print an expression over the `validate --deep` result data
+deep() { cli validate --deep "${@:2}" | python3 -c "import json, sys; d = json.load(sys.stdin)['data']; print($1)"; }
+issues() { deep "' '.join(sorted(i['type'] for i in d['issues']))" "$@"; }
+edit_config() {
+    python3 - "$WORK_DIR/config.json" "$1" <<'PY'
+import json, sys
+path = sys.argv[1]
+config = json.load(open(path))
+exec(sys.argv[2])
+json.dump(config, open(path, "w"), indent=2)
+PY
+}
+check() {
+    if eval "$2"; then
+        echo "  ✅ PASS: $1"
+        TESTS_PASSED=$((TESTS_PASSED + 1))
+    else
+        echo "  ❌ FAIL: $1"
+        TESTS_FAILED=$((TESTS_FAILED + 1))
+    fi
+}
+
+echo "🧪 Running Test Suite: Deep validation"
+echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
+echo ""
+
+# Test 1: Cached results are reused per mapping
+echo "Test 1: Caching deep check results..."
+check "First run checks every mapping" \
+    '[ "$(deep "d[\"deep\"][\"mappings_checked\"], d[\"deep\"][\"cache_hits\"]")" = "3 0" ]'
+check "Clean tree is valid" '[ "$(deep "d[\"config_valid\"], len(d[\"issues\"])")" = "True 0" ]'
+check "Cached run checks nothing" \
+    '[ "$(deep "d[\"deep\"][\"mappings_checked\"], d[\"deep\"][\"cache_hits\"]")" = "0 3" ]'
+echo "BODY-BETA-EDITED" > "$WORK_DIR/snippets/beta.md"
+check "Editing one file re-checks only its mapping" \
+    '[ "$(deep "d[\"deep\"][\"mappings_checked\"], d[\"deep\"][\"cache_hits\"]")" = "1 2" ]'
+edit_config 'config["mappings"][2]["pattern"] = "\\bgamma2\\b"'
+check "Editing one pattern re-checks only its mapping" \
+    '[ "$(deep "d[\"deep\"][\"mappings_checked\"], d[\"deep\"][\"cache_hits\"]")" = "1 2" ]'
+echo ""
+
+# Test 2: Pattern probes
+echo "Test 2: Probing patterns..."
+edit_config 'config["mappings"][0]["pattern"] = ".*"; config["mappings"][1]["pattern"] = "(a+)+$"'
+check "Catch-all and backtracking patterns flagged" \
+    '[ "$(issues --jobs 2)" = "matches_every_prompt slow_pattern" ]'
+check "Cached slow pattern confirmed again" \
+    '[ "$(deep "d[\"deep\"][\"cache_hits\"], d[\"deep\"][\"reprobed\"]")" = "3 1" ]'
+check "Cached issues reported again" '[ "$(issues)" = "matches_every_prompt slow_pattern" ]'
+edit_config 'config["mappings"][0]["pattern"] = "\\balpha\\b"; config["mappings"][1]["pattern"] = "\\bbeta\\b"'
+check "Fixed patterns clear the issues" '[ -z "$(issues)" ]'
+# A probe slowed down by load once must not stay flagged from the cache
+python3 - "$WORK_DIR/.cache/validate.json" <<'PY'
+import json, sys
+path = sys.argv[1]
+cache = json.load(open(path))
+for issues in cache["mappings"].values():
+    issues.append({"type": "slow_pattern", "snippet": [], "details": {"pattern": "\\balpha\\b"}})
+json.dump(cache, open(path, "w"))
+PY
+check "Cached slow_pattern re-probed before reporting" \
+    '[ "$(deep "d[\"deep\"][\"reprobed\"], len(d[\"issues\"])")" = "3 0" ]'
+check "Re-probed result replaces the cached one" '[ "$(deep "d[\"deep\"][\"reprobed\"]")" = "0" ]'
+echo ""
+
+# Test 3: Size limits and encodings
+echo "Test 3: Checking sizes and encodings..."
+head -c 200 /dev/zero | tr '\0' 'x' > "$WORK_DIR/snippets/alpha.md"
+edit_config 'config["limits"] = {"max_file_bytes": 100, "max_mapping_bytes": 150}'
+check "Limit change re-checks every mapping" '[ "$(deep "d[\"deep\"][\"mappings_checked\"]")" = "3" ]'
+check "Oversized file and mapping flagged" '[ "$(issues)" = "oversized_file oversized_mapping" ]'
+echo "BODY-ALPHA" > "$WORK_DIR/snippets/alpha.md"
+printf 'BODY-\xff-GAMMA\n' > "$WORK_DIR/snippets/gamma.md"
+check "Invalid UTF-8 flagged" '[ "$(issues)" = "invalid_encoding" ]'
+echo "BODY-GAMMA" > "$WORK_DIR/snippets/gamma.md"
+echo ""
+
+# Test 4: Blob integrity
+echo "Test 4: Verifying blobs..."
+cli storage blobs >/dev/null
+check "Blob-backed tree is valid" '[ -z "$(issues)" ]'
+blob=$(find "$WORK_DIR/blobs" -type f | head -n 1)
+echo "TAMPERED" > "$blob"
+check "Corrupted blob detected despite the cache" '[ "$(issues)" = "corrupt_blob" ]'
+rm "$blob"
+check "Missing blob detected" '[ "$(issues)" = "missing_blob" ]'
+echo ""
+
+# Summary
+echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
+echo "Test Results:"
+echo "  ✅ Passed: $TESTS_PASSED"
+echo "  ❌ Failed: $TESTS_FAILED"
+echo "  📊 Total: $((TESTS_PASSED + TESTS_FAILED))"
+echo ""
+
+if [ $TESTS_FAILED -eq 0 ]; then
+    echo "🎉 All tests passed!"
+    exit 0
+else
+    echo "⚠️  Some tests failed. Please review the output above."
+    exit 1
+fi
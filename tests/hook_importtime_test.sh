@@ -0,0 +1,116 @@
+#!/bin/bash
+# Test Suite: Hook cold-start import budget
+# Fails if the hook imports modules it doesn't need before matching, or if
+# the import time of its own modules (python -X importtime, beyond an
+# interpreter that already imported json and re) regresses past the budget in
+# snippets_cli.py (IMPORT_BUDGET_MS). Runs against a copy of the tree with the
+# hook's modules precompiled, as `install.sh --compile` leaves them.
+
+set -e
+
+SNIPPETS_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+WORK_DIR=$(mktemp -d)
+trap 'rm -rf "$WORK_DIR"' EXIT
+HOOK="$WORK_DIR/snippet-injector.py"
+# Claude Code always sends a session_id, and dedup is on by default
+HOOK_INPUT='{"prompt": "Testing HTML with codex", "session_id": "importtime-test"}'
+FORBIDDEN_MODULES="pathlib typing argparse hashlib subprocess datetime shutil"
+RUNS=5
+TESTS_PASSED=0
+TESTS_FAILED=0
+
+cp "$SNIPPETS_DIR"/*.py "$SNIPPETS_DIR/config.json" "$WORK_DIR"/
+cp -R "$SNIPPETS_DIR/snippets" "$WORK_DIR/snippets"
+# Bytecode is never cached under PYTHONDONTWRITEBYTECODE, so precompile like
+# install.sh does; otherwise every run measures compiling the modules
+python3 -m compileall -q "$WORK_DIR"/snippet_*.py >/dev/null
+
+echo "🧪 Running Test Suite: Hook cold-start imports"
+echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
+echo ""
+
+# Test 1: Precompiled artifact builds
+echo "Test 1: Compiling config artifact..."
+if (cd "$WORK_DIR" && python3 snippets_cli.py compile 2>/dev/null) | grep -q '"success": true'; then
+    echo "  ✅ PASS: Artifact compiled"
+    TESTS_PASSED=$((TESTS_PASSED + 1))
+else
+    echo "  ❌ FAIL: snippets_cli.py compile failed"
+    TESTS_FAILED=$((TESTS_FAILED + 1))
+fi
+echo ""
+
+# Collect importtime output for the hook and for the baseline interpreter
+baseline_code=$(cd "$WORK_DIR" && python3 -c "from snippets_cli import IMPORT_BASELINE; print(IMPORT_BASELINE)")
+baseline=$(python3 -X importtime -c "$baseline_code" 2>&1 >/dev/null)
+profiles=()
+for _ in $(seq $RUNS); do
+    profiles+=("$(echo "$HOOK_INPUT" | python3 -X importtime "$HOOK" 2>&1 >/dev/null)")
+done
+
+# Test 2: No nonessential modules on the cold-start path
+echo "Test 2: Checking for nonessential imports..."
+found=""
+for module in $FORBIDDEN_MODULES; do
+    if echo "${profiles[0]}" | grep -qE "\| +$module$"; then
+        found="$found $module"
+    fi
+done
+if [ -z "$found" ]; then
+    echo "  ✅ PASS: None of [$FORBIDDEN_MODULES] imported"
+    TESTS_PASSED=$((TESTS_PASSED + 1))
+else
+    echo "  ❌ FAIL: Hook imports:$found"
+    TESTS_FAILED=$((TESTS_FAILED + 1))
+fi
+echo ""
+
+# Test 3: Import time of the hook's own modules stays within budget
+echo "Test 3: Checking import time budget (best of $RUNS)..."
+result=$(BASELINE="$baseline" python3 - "$WORK_DIR" "${profiles[@]}" <<'PY'
+import os, sys
+sys.path.insert(0, sys.argv[1])
+from snippets_cli import IMPORT_BUDGET_MS
+
+def parse(text):
+    profile = {}
+    for line in text.splitlines():
+        if line.startswith("import time:") and "self [us]" not in line:
+            self_us, _, module = line[len("import time:"):].split("|")
+            profile[module.strip()] = int(self_us)
+    return profile
+
+startup = parse(os.environ["BASELINE"])
+totals = []
+for text in sys.argv[2:]:
+    profile = parse(text)
+    totals.append(sum(us for m, us in profile.items() if m not in startup) / 1000)
+best = min(totals)
+print(f"{best:.2f} {IMPORT_BUDGET_MS:.2f} {'ok' if best <= IMPORT_BUDGET_MS else 'over'}")
+PY
+)
+read -r import_ms budget_ms verdict <<< "$result"
+if [ "$verdict" = "ok" ]; then
+    echo "  ✅ PASS: ${import_ms}ms of imports (budget ${budget_ms}ms)"
+    TESTS_PASSED=$((TESTS_PASSED + 1))
+else
+    echo "  ❌ FAIL: ${import_ms}ms of imports exceeds budget ${budget_ms}ms"
+    TESTS_FAILED=$((TESTS_FAILED + 1))
+fi
+echo ""
+
+# Summary
+echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
+echo "Test Results:"
+echo "  ✅ Passed: $TESTS_PASSED"
+echo "  ❌ Failed: $TESTS_FAILED"
+echo "  📊 Total: $((TESTS_PASSED + TESTS_FAILED))"
+echo ""
+
+if [ $TESTS_FAILED -eq 0 ]; then
+    echo "🎉 All tests passed!"
+    exit 0
+else
+    echo "⚠️  Some tests failed. Please review the output above."
+    exit 1
+fi
@@ -0,0 +1,122 @@
+#!/bin/bash
+# Test Suite: Trigger rules
+# Runs the CLI and hook against a throwaway snippets root and checks rule
+# parsing errors, hit thresholds, not/and/or precedence, rule rewriting on
+# rename, `test` explanations and unique keys for unnamed mappings.
+
+set -e
+
+SNIPPETS_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+WORK_DIR=$(mktemp -d)
+trap 'rm -rf "$WORK_DIR"' EXIT
+TESTS_PASSED=0
+TESTS_FAILED=0
+
+cp "$SNIPPETS_DIR"/*.py "$WORK_DIR"/
+mkdir -p "$WORK_DIR/snippets/nested"
+echo "BODY-ALPHA" > "$WORK_DIR/snippets/alpha.md"
+echo "BODY-BETA" > "$WORK_DIR/snippets/beta.md"
+echo "BODY-GAMMA" > "$WORK_DIR/snippets/gamma.md"
+echo "BODY-TWIN-TOP" > "$WORK_DIR/snippets/twin.md"
+echo "BODY-TWIN-NESTED" > "$WORK_DIR/snippets/nested/twin.md"
+cat > "$WORK_DIR/config.json" <<'JSON'
+{
+  "mappings": [
+    {"name": "alpha", "pattern": "\\balpha\\b", "snippet": ["snippets/alpha.md"], "when": "self >= 2"},
+    {"name": "beta", "pattern": "\\bbeta\\b", "snippet": ["snippets/beta.md"]},
+    {"name": "gamma", "pattern": "\\bgamma\\b", "snippet": ["snippets/gamma.md"],
+     "when": "self and not beta or alpha"},
+    {"pattern": "\\btwintop\\b", "snippet": ["snippets/twin.md"]},
+    {"pattern": "\\btwinnested\\b", "snippet": ["snippets/nested/twin.md"]}
+  ]
+}
+JSON
+
+cli() { (cd "$WORK_DIR" && python3 snippets_cli.py "$@" 2>&1); }
+inject() { echo "{\"prompt\": \"$1\"}" | python3 "$WORK_DIR/snippet-injector.py" 2>/dev/null; }
+check() {
+    if eval "$2"; then
+        echo "  ✅ PASS: $1"
+        TESTS_PASSED=$((TESTS_PASSED + 1))
+    else
+        echo "  ❌ FAIL: $1"
+        TESTS_FAILED=$((TESTS_FAILED + 1))
+    fi
+}
+
+echo "🧪 Running Test Suite: Trigger rules"
+echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
+echo ""
+cli compile >/dev/null
+
+# Test 1: Parser rejects malformed rules and unknown names
+echo "Test 1: Rejecting invalid rules..."
+check "Dangling operator rejected" \
+    '[[ $(cli create bad --pattern bad --content x --when "self and") == *INVALID_RULE* ]]'
+check "Unbalanced parenthesis rejected" \
+    '[[ $(cli create bad --pattern bad --content x --when "(self or beta") == *INVALID_RULE* ]]'
+check "Unknown mapping name rejected" \
+    '[[ $(cli create bad --pattern bad --content x --when "self and nosuch") == *INVALID_RULE* ]]'
+echo ""
+
+# Test 2: Hit thresholds
+echo "Test 2: Checking hit thresholds..."
+check "One hit does not satisfy 'self >= 2'" '[[ $(inject "alpha once") != *BODY-ALPHA* ]]'
+check "Two hits satisfy 'self >= 2'" '[[ $(inject "alpha and alpha") == *BODY-ALPHA* ]]'
+echo ""
+
+# Test 3: Precedence: 'self and not beta or alpha' == '(self and (not beta)) or alpha'
+echo "Test 3: Checking not/and/or precedence..."
+check "Own pattern alone fires" '[[ $(inject "gamma") == *BODY-GAMMA* ]]'
+check "'not beta' binds tighter than 'and'" '[[ $(inject "gamma beta") != *BODY-GAMMA* ]]'
+check "'or alpha' applies to the whole conjunction" '[[ $(inject "beta gamma alpha") == *BODY-GAMMA* ]]'
+echo ""
+
+# Test 4: Renaming a mapping rewrites rules that reference it
+echo "Test 4: Renaming rewrites rule references..."
+cli update beta --rename delta >/dev/null
+when=$(python3 -c "import json; print([m for m in json.load(open('$WORK_DIR/config.json'))['mappings'] if m.get('name') == 'gamma'][0]['when'])")
+check "Rule now references 'delta' ($when)" '[ "$when" = "self and not delta or alpha" ]'
+check "Renamed mapping still suppresses gamma" '[[ $(inject "gamma beta") != *BODY-GAMMA* ]]'
+echo ""
+
+# Test 5: `test` explains why a rule fired
+echo "Test 5: Checking test explanations..."
+explanation=$(cli test gamma "gamma beta" | python3 -c "import json, sys; d = json.load(sys.stdin)['data']; print(d['fired'], d['explanation'])")
+check "Rule reported as not fired" '[[ $explanation == False* ]]'
+check "Explanation shows each pattern's hits ($explanation)" \
+    '[[ $explanation == *"gamma[1>=1]=T"* && $explanation == *"delta[1>=1]=T"* && $explanation == *"alpha[0>=1]=F"* ]]'
+echo ""
+
+# Test 6: Unnamed mappings with the same file stem stay distinct
+echo "Test 6: Keying unnamed mappings..."
+top=$(inject "twintop")
+nested=$(inject "twinnested")
+check "Top-level file injected alone" '[[ $top == *BODY-TWIN-TOP* && $top != *BODY-TWIN-NESTED* ]]'
+check "Nested file injected alone" '[[ $nested == *BODY-TWIN-NESTED* && $nested != *BODY-TWIN-TOP* ]]'
+python3 - "$WORK_DIR/config.json" <<'PY'
+import json, sys
+path = sys.argv[1]
+config = json.load(open(path))
+config["mappings"].append({"name": "alpha", "pattern": "\\bomega\\b", "snippet": ["snippets/beta.md"]})
+json.dump(config, open(path, "w"), indent=2)
+PY
+check "Duplicate mapping names reported by validate" \
+    '[[ $(cli validate) == *"Duplicate mapping name '"'"'alpha'"'"'"* ]]'
+echo ""
+
+# Summary
+echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
+echo "Test Results:"
+echo "  ✅ Passed: $TESTS_PASSED"
+echo "  ❌ Failed: $TESTS_FAILED"
+echo "  📊 Total: $((TESTS_PASSED + TESTS_FAILED))"
+echo ""
+
+if [ $TESTS_FAILED -eq 0 ]; then
+    echo "🎉 All tests passed!"
+    exit 0
+else
+    echo "⚠️  Some tests failed. Please review the output above."
+    exit 1
+fi
@@ -0,0 +1,138 @@
+#!/bin/bash
+# Test Suite: Session dedup
+# Runs the hook against a throwaway snippets root and checks that a body is
+# injected once per session, re-sent when edited or after
+# reinject_after_turns, and re-sent after compaction, and that idle session
+# records expire.
+
+set -e
+
+SNIPPETS_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+WORK_DIR=$(mktemp -d)
+trap 'rm -rf "$WORK_DIR"' EXIT
+TESTS_PASSED=0
+TESTS_FAILED=0
+
+cp "$SNIPPETS_DIR"/*.py "$WORK_DIR"/
+mkdir -p "$WORK_DIR/snippets"
+echo "BODY-ALPHA" > "$WORK_DIR/snippets/alpha.md"
+cat > "$WORK_DIR/config.json" <<'JSON'
+{
+  "session": {"dedup": true, "reinject_after_turns": 0},
+  "mappings": [
+    {"name": "alpha", "pattern": "\\balpha\\b", "snippet": ["snippets/alpha.md"]}
+  ]
+}
+JSON
+
+SESSIONS_DIR="$WORK_DIR/.cache/sessions"
+hook() { echo "$1" | python3 "$WORK_DIR/snippet-injector.py" 2>/dev/null; }
+prompt() { hook "{\"prompt\": \"alpha\", \"session_id\": \"$1\"}"; }
+set_session() {
+    python3 - "$WORK_DIR/config.json" "$1" <<'PY'
+import json, sys
+path = sys.argv[1]
+config = json.load(open(path))
+config["session"] = json.loads(sys.argv[2])
+json.dump(config, open(path, "w"), indent=2)
+PY
+}
+# Make session records look idle for 2 hours
+backdate() {
+    python3 - "$SESSIONS_DIR" "$@" <<'PY'
+import os, sys, time
+past = time.time() - 2 * 3600
+for session_id in sys.argv[2:]:
+    os.utime(os.path.join(sys.argv[1], f"{session_id}.marshal"), (past, past))
+PY
+}
+check() {
+    if eval "$2"; then
+        echo "  ✅ PASS: $1"
+        TESTS_PASSED=$((TESTS_PASSED + 1))
+    else
+        echo "  ❌ FAIL: $1"
+        TESTS_FAILED=$((TESTS_FAILED + 1))
+    fi
+}
+
+echo "🧪 Running Test Suite: Session dedup"
+echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
+echo ""
+
+# Test 1: A body is sent once per session
+echo "Test 1: Injecting once per session..."
+check "First prompt injects" '[[ $(prompt s1) == *BODY-ALPHA* ]]'
+check "Second prompt in the same session skips" '[ -z "$(prompt s1)" ]'
+check "Another session still injects" '[[ $(prompt s2) == *BODY-ALPHA* ]]'
+check "Prompts without a session_id always inject" \
+    '[[ $(hook "{\"prompt\": \"alpha\"}") == *BODY-ALPHA* && $(hook "{\"prompt\": \"alpha\"}") == *BODY-ALPHA* ]]'
+echo ""
+
+# Test 2: Editing a snippet sends the new body again
+echo "Test 2: Re-sending edited bodies..."
+echo "BODY-ALPHA-EDITED" > "$WORK_DIR/snippets/alpha.md"
+check "Edited body injected in the same session" '[[ $(prompt s1) == *BODY-ALPHA-EDITED* ]]'
+check "Edited body then skipped" '[ -z "$(prompt s1)" ]'
+echo ""
+
+# Test 3: Compaction forgets what the session was sent
+echo "Test 3: Resetting on compaction..."
+hook '{"hook_event_name": "SessionStart", "source": "resume", "session_id": "s1"}' >/dev/null
+check "SessionStart (resume) keeps the record" '[ -z "$(prompt s1)" ]'
+check "PreCompact produces no output" \
+    '[ -z "$(hook "{\"hook_event_name\": \"PreCompact\", \"trigger\": \"auto\", \"session_id\": \"s1\"}")" ]'
+check "Body re-sent after PreCompact" '[[ $(prompt s1) == *BODY-ALPHA* ]]'
+hook '{"hook_event_name": "SessionStart", "source": "compact", "session_id": "s1"}' >/dev/null
+check "Body re-sent after SessionStart (compact)" '[[ $(prompt s1) == *BODY-ALPHA* ]]'
+echo ""
+
+# Test 4: reinject_after_turns and dedup settings
+echo "Test 4: Honouring session settings..."
+set_session '{"dedup": true, "reinject_after_turns": 2}'
+check "Turn 1 injects" '[[ $(prompt s3) == *BODY-ALPHA* ]]'
+check "Turn 2 skips" '[ -z "$(prompt s3)" ]'
+check "Turn 3 re-injects after 2 turns" '[[ $(prompt s3) == *BODY-ALPHA* ]]'
+set_session '{"dedup": false}'
+check "dedup off injects every turn" '[[ $(prompt s4) == *BODY-ALPHA* && $(prompt s4) == *BODY-ALPHA* ]]'
+echo ""
+
+# Test 5: Turning dedup off also skips loading session state
+echo "Test 5: Checking dedup off..."
+imports=$(echo '{"prompt": "alpha", "session_id": "s5"}' | python3 -X importtime "$WORK_DIR/snippet-injector.py" 2>&1 >/dev/null)
+check "snippet_session not imported with dedup off" '[[ $imports != *snippet_session* ]]'
+echo ""
+
+# Test 6: Idle session records expire after ttl_hours
+echo "Test 6: Expiring idle sessions..."
+set_session '{"dedup": true, "ttl_hours": 1}'
+prompt stale1 >/dev/null
+prompt stale2 >/dev/null
+prompt fresh >/dev/null
+backdate stale1 stale2
+prompt s6 >/dev/null
+check "New session removes records idle past ttl_hours" \
+    '[ ! -f "$SESSIONS_DIR/stale1.marshal" ] && [ ! -f "$SESSIONS_DIR/stale2.marshal" ]'
+check "Recently used records are kept" '[ -f "$SESSIONS_DIR/fresh.marshal" ]'
+prompt stale3 >/dev/null
+backdate stale3
+removed=$(cd "$WORK_DIR" && python3 snippets_cli.py gc 2>&1 | python3 -c "import json, sys; print(json.load(sys.stdin)['data']['sessions_removed'])")
+check "snippets_cli.py gc removes idle records ($removed)" \
+    '[ "$removed" = "1" ] && [ ! -f "$SESSIONS_DIR/stale3.marshal" ] && [ -f "$SESSIONS_DIR/fresh.marshal" ]'
+echo ""
+
+# Summary
+echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
+echo "Test Results:"
+echo "  ✅ Passed: $TESTS_PASSED"
+echo "  ❌ Failed: $TESTS_FAILED"
+echo "  📊 Total: $((TESTS_PASSED + TESTS_FAILED))"
+echo ""
+
+if [ $TESTS_FAILED -eq 0 ]; then
+    echo "🎉 All tests passed!"
+    exit 0
+else
+    echo "⚠️  Some tests failed. Please review the output above."
+    exit 1
+fi
@@ -0,0 +1,126 @@
+#!/bin/bash
+# Test Suite: Watch mode
+# Runs `watch` against a throwaway snippets root and checks the one-shot
+# check, survival of malformed config edits, artifact rebuilds, blob
+# repointing and VERIFICATION_HASH updates in test scripts.
+
+set -e
+
+SNIPPETS_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+WORK_DIR=$(mktemp -d)
+WATCH_PID=""
+trap '[ -n "$WATCH_PID" ] && kill $WATCH_PID 2>/dev/null; rm -rf "$WORK_DIR"' EXIT
+TESTS_PASSED=0
+TESTS_FAILED=0
+
+cp "$SNIPPETS_DIR"/*.py "$WORK_DIR"/
+mkdir -p "$WORK_DIR/snippets" "$WORK_DIR/tests"
+echo "BODY-ALPHA" > "$WORK_DIR/snippets/alpha.md"
+cat > "$WORK_DIR/tests/alpha_test.sh" <<'SH'
+#!/bin/bash
+# Verification Hash: 0000000000000000
+VERIFICATION_HASH="0000000000000000"
+SH
+cat > "$WORK_DIR/config.json" <<'JSON'
+{
+  "mappings": [
+    {"name": "alpha", "pattern": "\\balpha\\b", "snippet": ["snippets/alpha.md"]},
+    {"name": "ghost", "pattern": "\\bghost\\b", "snippet": ["snippets/ghost.md"]}
+  ]
+}
+JSON
+
+cli() { (cd "$WORK_DIR" && python3 snippets_cli.py "$@" 2>&1); }
+inject() { echo "{\"prompt\": \"$1\"}" | python3 "$WORK_DIR/snippet-injector.py" 2>/dev/null; }
+edit_config() {
+    python3 - "$WORK_DIR/config.json" "$1" <<'PY'
+import json, sys
+path = sys.argv[1]
+config = json.load(open(path))
+exec(sys.argv[2])
+json.dump(config, open(path, "w"), indent=2)
+PY
+}
+# Wait up to 5s for a file to contain a string
+wait_for() {
+    for _ in $(seq 50); do
+        grep -qF -- "$2" "$1" 2>/dev/null && return 0
+        sleep 0.1
+    done
+    return 1
+}
+check() {
+    if eval "$2"; then
+        echo "  ✅ PASS: $1"
+        TESTS_PASSED=$((TESTS_PASSED + 1))
+    else
+        echo "  ❌ FAIL: $1"
+        TESTS_FAILED=$((TESTS_FAILED + 1))
+    fi
+}
+
+echo "🧪 Running Test Suite: Watch mode"
+echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
+echo ""
+
+# Test 1: One-shot check
+echo "Test 1: Checking the tree with --once..."
+check "Missing file fails the check" '[[ $(cli watch --once) == *"Snippet file missing: snippets/ghost.md"*WATCH_ERRORS* ]]'
+printf 'BODY-\xff-GHOST\n' > "$WORK_DIR/snippets/ghost.md"
+check "Invalid UTF-8 fails the check" '[[ $(cli watch --once) == *ENCODING_ERROR* ]]'
+echo "BODY-GHOST" > "$WORK_DIR/snippets/ghost.md"
+check "Valid tree passes" 'cli watch --once >/dev/null'
+check "Artifact compiled" '[[ $(inject "ghost") == *BODY-GHOST* ]]'
+echo ""
+
+# Move into blob storage with ghost.md missing, so its blob is still null
+rm "$WORK_DIR/snippets/ghost.md"
+cli storage blobs >/dev/null
+
+(cd "$WORK_DIR" && exec python3 snippets_cli.py watch --debounce-ms 50 > watch.out 2> watch.err) &
+WATCH_PID=$!
+wait_for "$WORK_DIR/watch.out" "Watching for changes" || true
+
+# Test 2: Malformed config edits are reported, not fatal
+echo "Test 2: Surviving malformed config edits..."
+artifact_sum=$(cksum < "$WORK_DIR/.cache/config.marshal")
+edit_config 'del config["mappings"][0]["pattern"]'
+check "Missing pattern reported" 'wait_for "$WORK_DIR/watch.err" "Mapping #0 needs a \\\"pattern\\\" string"'
+check "Watcher still running" 'kill -0 $WATCH_PID 2>/dev/null'
+check "Last good artifact kept" '[ "$(cksum < "$WORK_DIR/.cache/config.marshal")" = "$artifact_sum" ]'
+edit_config 'config["mappings"][0]["pattern"] = "\\balfa\\b"'
+check "Fixed config recompiled" 'wait_for "$WORK_DIR/watch.out" "Rebuilt config"'
+check "Hook uses the new pattern" '[[ $(inject "alfa") == *BODY-ALPHA* ]]'
+echo ""
+
+# Test 3: Snippet edits repoint blobs and update test expectations
+echo "Test 3: Rebuilding edited snippets..."
+printf 'BODY-ALPHA-EDITED\n\n**VERIFICATION_HASH:** `1234abcd5678ef90`\n' > "$WORK_DIR/snippets/alpha.md"
+check "Edit repoints the blob" 'wait_for "$WORK_DIR/watch.out" "\"repointed\""'
+check "Hook reads the edited body" '[[ $(inject "alfa") == *BODY-ALPHA-EDITED* ]]'
+check "VERIFICATION_HASH updated in tests/alpha_test.sh" \
+    'grep -q "^VERIFICATION_HASH=\"1234abcd5678ef90\"" "$WORK_DIR/tests/alpha_test.sh"'
+check "Verification Hash comment updated" \
+    'grep -q "^# Verification Hash: 1234abcd5678ef90" "$WORK_DIR/tests/alpha_test.sh"'
+echo "BODY-GHOST-ARRIVED" > "$WORK_DIR/snippets/ghost.md"
+check "File missing at migration gets its blob" 'wait_for "$WORK_DIR/watch.out" "snippets/ghost.md"'
+check "Hook injects the new file" '[[ $(inject "ghost") == *BODY-GHOST-ARRIVED* ]]'
+check "No errors for valid edits" \
+    '[ "$(grep -c "\"success\": false" "$WORK_DIR/watch.err")" = "1" ]'
+echo ""
+
+# Summary
+echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
+echo "Test Results:"
+echo "  ✅ Passed: $TESTS_PASSED"
+echo "  ❌ Failed: $TESTS_FAILED"
+echo "  📊 Total: $((TESTS_PASSED + TESTS_FAILED))"
+echo ""
+
+if [ $TESTS_FAILED -eq 0 ]; then
+    echo "🎉 All tests passed!"
+    exit 0
+else
+    echo "⚠️  Some tests failed. Please review the output above."
+    exit 1
+fi